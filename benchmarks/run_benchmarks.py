@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import pedigreeGroupUnrelated as pgu
+from synthetic_pedigree import synthetic_pedigree
+
+STAGES = ["read_csv", "build_pedigree_index", "validate_pedigree", "less_related", "select_participants", "select_participants_mis",
+          "ped_annotate_selected", "individual_profile", "gen_stratification", "graph_pedigree"]
+
+
+def get_input_args():
+    """
+    Inputs are introduced through command line
+    Args:
+        None
+    Inputs:
+        --sizes approximate number of PED rows of each benchmarked file
+        --stages stages to benchmark
+        --depth, --fanout, --singleParentRate, --seed synthetic pedigree settings, see synthetic_pedigree.py
+        --graphRows largest file on which the per-family graph stages are benchmarked
+        --noMemory do not measure the peak memory of each stage
+        --output path of the JSON results
+        --baseline JSON results of a previous run to compare with
+        --tolerance slowdown factor over the baseline reported as a regression
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default = [1000, 10000, 100000, 1000000], type = int, nargs = '+',
+                        help = 'approximate number of PED rows of each benchmarked file, up to 10000000')
+    parser.add_argument('--stages', default = STAGES, nargs = '+', choices = STAGES,
+                        help = 'stages to benchmark')
+    parser.add_argument('--depth', default = 4, type = int,
+                        help = 'number of generations below the founder couple of each family')
+    parser.add_argument('--fanout', default = 2.0, type = float,
+                        help = 'mean number of children per couple')
+    parser.add_argument('--singleParentRate', default = 0.1, type = float,
+                        help = 'share of children with only one registered ascendant')
+    parser.add_argument('--seed', default = 0, type = int,
+                        help = 'seed of the random generator')
+    parser.add_argument('--graphRows', default = 100000, type = int,
+                        help = 'largest file on which the per-family graph stages are benchmarked')
+    parser.add_argument('--noMemory', action = 'store_true',
+                        help = 'do not measure the peak memory of each stage')
+    parser.add_argument('--output', default = 'benchmark_results.json', type = str,
+                        help = 'path of the JSON results')
+    parser.add_argument('--baseline', default = None, type = str,
+                        help = 'JSON results of a previous run to compare with')
+    parser.add_argument('--tolerance', default = 1.5, type = float,
+                        help = 'slowdown factor over the baseline reported as a regression')
+    return parser.parse_args()
+
+def measure(function, traceMemory = True):
+    """
+    Runs a function once to time it and, when traceMemory is set, once more under tracemalloc to find its peak memory,
+    so that tracing does not slow the timed run.
+    Returns:
+        The output of the function, the wall time in seconds and the peak memory in MB (None when not traced).
+    """
+    start = time.perf_counter()
+    output = function()
+    seconds = time.perf_counter() - start
+    peakMB = None
+    if traceMemory:
+        tracemalloc.start()
+        function()
+        peakMB = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return(output, seconds, peakMB)
+
+def graph_stages(annotatedPED, pedigreeIndex, save_dir):
+    """
+    Runs individual_profile, gen_stratification and graph_pedigree over every family, returning the time spent in
+    each of them.
+    """
+    seconds = {"individual_profile": 0.0, "gen_stratification": 0.0, "graph_pedigree": 0.0}
+    for family in pedigreeIndex["families"]:
+        familyIndex = pgu.family_index(pedigreeIndex, family)
+        filteredPED = annotatedPED.iloc[familyIndex["rows"]].reset_index()
+        start = time.perf_counter()
+        individualProfileDatabase = pgu.individual_profile(filteredPED, familyIndex)
+        seconds["individual_profile"] += time.perf_counter() - start
+        start = time.perf_counter()
+        genNodes, descNode = pgu.gen_stratification(individualProfileDatabase)
+        seconds["gen_stratification"] += time.perf_counter() - start
+        start = time.perf_counter()
+        pgu.graph_pedigree(individualProfileDatabase, family, genNodes, descNode, save_dir)
+        seconds["graph_pedigree"] += time.perf_counter() - start
+    return(seconds)
+
+def benchmark_size(rows, argsParse, workDir):
+    """
+    Benchmarks every requested stage on a synthetic pedigree of about the given number of rows.
+    Returns:
+        A list of result entries, one per stage.
+    """
+    sample = synthetic_pedigree(200, argsParse.depth, argsParse.fanout, argsParse.singleParentRate, seed = argsParse.seed)
+    families = max(1, round(rows * 200 / len(sample)))
+    PED = synthetic_pedigree(families, argsParse.depth, argsParse.fanout, argsParse.singleParentRate,
+                             seed = argsParse.seed)
+    pedigreeFile = os.path.join(workDir, 'synthetic.ped')
+    PED.to_csv(pedigreeFile, sep = '\t', index = False)
+    save_dir = os.path.join(workDir, 'results') + os.sep
+    traceMemory = not argsParse.noMemory
+    timings = {}
+    PED, timings["read_csv"], readMB = measure(lambda: pd.read_csv(pedigreeFile, sep = '\t'), traceMemory)
+    peaks = {"read_csv": readMB}
+    pedigreeIndex, timings["build_pedigree_index"], peaks["build_pedigree_index"] = measure(
+        lambda: pgu.build_pedigree_index(PED), traceMemory)
+    output, timings["validate_pedigree"], peaks["validate_pedigree"] = measure(
+        lambda: pgu.validate_pedigree(PED, pedigreeIndex), traceMemory)
+    lessRelatedDatabase, timings["less_related"], peaks["less_related"] = measure(
+        lambda: pgu.less_related(PED), traceMemory)
+    proposed_participants, timings["select_participants"], peaks["select_participants"] = measure(
+        lambda: pgu.select_participants(lessRelatedDatabase, pedigreeIndex), traceMemory)
+    if "select_participants_mis" in argsParse.stages:
+        output, timings["select_participants_mis"], peaks["select_participants_mis"] = measure(
+            lambda: pgu.select_participants_mis(pedigreeIndex), traceMemory)
+    annotatedPED, timings["ped_annotate_selected"], peaks["ped_annotate_selected"] = measure(
+        lambda: pgu.ped_annotate_selected(PED.copy(), proposed_participants, save_dir), traceMemory)
+    if len(PED) <= argsParse.graphRows and any(e in argsParse.stages for e in ["individual_profile",
+                                                                              "gen_stratification", "graph_pedigree"]):
+        graphSeconds, seconds, graphMB = measure(lambda: graph_stages(annotatedPED, pedigreeIndex, save_dir),
+                                                 traceMemory)
+        for stage in graphSeconds:
+            timings[stage] = graphSeconds[stage]
+            peaks[stage] = graphMB
+    results = []
+    for stage in argsParse.stages:
+        if stage in timings:
+            results.append({"rows": len(PED), "targetRows": rows, "families": families, "stage": stage,
+                            "seconds": timings[stage], "usPerRow": timings[stage] / len(PED) * 1e6,
+                            "peakMB": peaks[stage]})
+    return(results)
+
+def regressions(results, baseline, tolerance):
+    """
+    Compares the time per row of every stage and size with a previous run.
+    Returns:
+        The list of result entries slower than tolerance times the baseline.
+    """
+    previous = {(e["targetRows"], e["stage"]): e for e in baseline["results"]}
+    slower = []
+    for entry in results:
+        reference = previous.get((entry["targetRows"], entry["stage"]))
+        if reference is not None and entry["usPerRow"] > reference["usPerRow"] * tolerance:
+            slower.append(entry)
+    return(slower)
+
+if __name__ == "__main__":
+    argsParse = get_input_args()
+    workDir = tempfile.mkdtemp()
+    results = []
+    try:
+        print("rows\tstage\tseconds\tus_per_row\tpeak_MB")
+        for rows in argsParse.sizes:
+            for entry in benchmark_size(rows, argsParse, workDir):
+                results.append(entry)
+                peak = "-" if entry["peakMB"] is None else format(entry["peakMB"], ".1f")
+                print(str(entry["rows"]) + "\t" + entry["stage"] + "\t" + format(entry["seconds"], ".3f") + "\t" +
+                      format(entry["usPerRow"], ".3f") + "\t" + peak)
+    finally:
+        shutil.rmtree(workDir, ignore_errors = True)
+    config = {key: value for key, value in vars(argsParse).items() if key not in ["output", "baseline", "tolerance"]}
+    with open(argsParse.output, 'w') as outputFile:
+        json.dump({"config": config, "results": results}, outputFile, indent = 1)
+    if argsParse.baseline is not None:
+        with open(argsParse.baseline) as baselineFile:
+            slower = regressions(results, json.load(baselineFile), argsParse.tolerance)
+        for entry in slower:
+            print("Regression: " + entry["stage"] + " on " + str(entry["rows"]) + " rows")
+        if len(slower) > 0:
+            sys.exit(1)
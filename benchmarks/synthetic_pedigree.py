@@ -0,0 +1,113 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+def get_input_args():
+    """
+    Inputs are introduced through command line
+    Args:
+        None
+    Inputs:
+        --families number of families
+        --depth number of generations below the founder couple of each family
+        --fanout mean number of children per couple
+        --singleParentRate share of children with only one registered ascendant
+        --marriageRate share of children that found a couple with a new founder
+        --seed seed of the random generator
+        --shuffle write the rows in random order instead of grouped by family
+        --output path of the PED file to write
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--families', default = 1000, type = int,
+                        help = 'number of families')
+    parser.add_argument('--depth', default = 4, type = int,
+                        help = 'number of generations below the founder couple of each family')
+    parser.add_argument('--fanout', default = 2.0, type = float,
+                        help = 'mean number of children per couple')
+    parser.add_argument('--singleParentRate', default = 0.1, type = float,
+                        help = 'share of children with only one registered ascendant')
+    parser.add_argument('--marriageRate', default = 0.8, type = float,
+                        help = 'share of children that found a couple with a new founder')
+    parser.add_argument('--seed', default = 0, type = int,
+                        help = 'seed of the random generator')
+    parser.add_argument('--shuffle', action = 'store_true',
+                        help = 'write the rows in random order instead of grouped by family')
+    parser.add_argument('--output', default = 'synthetic_pedigree.ped', type = str,
+                        help = 'path of the PED file to write')
+    return parser.parse_args()
+
+def synthetic_pedigree(families, depth = 4, fanout = 2.0, singleParentRate = 0.1, marriageRate = 0.8, seed = 0,
+                       shuffle = False):
+    """
+    Generates a seeded synthetic PED file. Every family starts with a founder couple. Each couple has a Poisson number of
+    children, part of them with only one registered ascendant, and part of the children found a couple with a new
+    founder, whose children form the next generation. All the families of a generation are generated at once with
+    NumPy, so that files of millions of rows are generated in seconds.
+    Args:
+      minimum:
+          families: number of families.
+      optional:
+          depth: number of generations below the founder couple of each family.
+          fanout: mean number of children per couple.
+          singleParentRate: share of children with only one registered ascendant.
+          marriageRate: share of children that found a couple with a new founder.
+          seed: seed of the random generator.
+          shuffle: return the rows in random order instead of grouped by family.
+    Returns:
+        A PED dataframe with the famid, id, fid, mid, sex and aff columns.
+    """
+    rng = np.random.default_rng(seed)
+    nextID = np.full(families, 3, dtype = np.int64)
+    coupleFamily = np.arange(1, families + 1)
+    coupleFather = np.ones(families, dtype = np.int64)
+    coupleMother = np.full(families, 2, dtype = np.int64)
+    columns = {"famid": [np.repeat(coupleFamily, 2)], "id": [np.tile([1, 2], families)],
+               "fid": [np.zeros(2 * families, dtype = np.int64)], "mid": [np.zeros(2 * families, dtype = np.int64)],
+               "sex": [np.tile([1, 2], families)]}
+
+    def new_ids(rowFamily):
+        #consecutive IDs inside each family, rowFamily is sorted
+        counts = np.bincount(rowFamily - 1, minlength = families)
+        starts = np.cumsum(counts) - counts
+        ids = nextID[rowFamily - 1] + np.arange(len(rowFamily)) - starts[rowFamily - 1]
+        nextID[:] += counts
+        return(ids)
+
+    for generation in range(0, depth):
+        nChildren = rng.poisson(fanout, len(coupleFamily))
+        childFamily = np.repeat(coupleFamily, nChildren)
+        childID = new_ids(childFamily)
+        childFather = np.repeat(coupleFather, nChildren)
+        childMother = np.repeat(coupleMother, nChildren)
+        singleParent = rng.random(len(childID)) < singleParentRate
+        dropFather = rng.random(len(childID)) < 0.5
+        childFather[singleParent & dropFather] = 0
+        childMother[singleParent & ~dropFather] = 0
+        childSex = rng.integers(1, 3, len(childID))
+        for column, values in zip(["famid", "id", "fid", "mid", "sex"],
+                                  [childFamily, childID, childFather, childMother, childSex]):
+            columns[column].append(values)
+        if generation == depth - 1:
+            break
+        married = rng.random(len(childID)) < marriageRate
+        coupleFamily = childFamily[married]
+        spouseID = new_ids(coupleFamily)
+        spouseSex = 3 - childSex[married]
+        for column, values in zip(["famid", "id", "fid", "mid", "sex"],
+                                  [coupleFamily, spouseID, np.zeros_like(spouseID), np.zeros_like(spouseID), spouseSex]):
+            columns[column].append(values)
+        coupleFather = np.where(spouseSex == 1, spouseID, childID[married])
+        coupleMother = np.where(spouseSex == 2, spouseID, childID[married])
+    PED = pd.DataFrame({column: np.concatenate(values) for column, values in columns.items()})
+    PED["aff"] = rng.integers(1, 3, len(PED))
+    if shuffle:
+        return(PED.sample(frac = 1, random_state = seed).reset_index(drop = True))
+    return(PED.sort_values("famid", kind = "stable").reset_index(drop = True))
+
+if __name__ == "__main__":
+    argsParse = get_input_args()
+    PED = synthetic_pedigree(argsParse.families, argsParse.depth, argsParse.fanout, argsParse.singleParentRate,
+                             argsParse.marriageRate, argsParse.seed, argsParse.shuffle)
+    PED.to_csv(argsParse.output, sep = '\t', index = False)
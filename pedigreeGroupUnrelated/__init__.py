@@ -0,0 +1,15 @@
+"""
+Defines a genetically unrelated group from a PED file.
+"""
+from .pedigree import (ancestry_roots, balanced_batches, build_pedigree_index, cached_pedigree, compact_dtypes,
+                       family_hashes, family_index, family_offsets, family_rng, kinship_index, less_related,
+                       lineage_groups, load_cache_index, load_pedigree_cache, load_selection_cache, missingness_index,
+                       ped_annotate_selected, pedigree_cycles, read_ped_families, redundants, repair_pedigree,
+                       save_pedigree_cache, save_selection_cache, scan_families, select_family, select_family_mis,
+                       select_participants, select_participants_mis, select_participants_parallel, selection_keys,
+                       selection_status, topological_order, validate_pedigree, write_selection_report,
+                       write_validation_report)
+from .pipeline import process_ped, run_pipeline, select_streaming, select_unrelated
+from .profiling import new_profiler, profile_stage, write_profile_report
+from .render import (gen_stratification, generation_layers, graph_pedigree, individual_profile, prune_family,
+                     render_dot_files, render_pedigrees)
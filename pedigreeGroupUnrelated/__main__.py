@@ -0,0 +1,106 @@
+import argparse
+
+from .pipeline import run_pipeline
+
+
+def get_input_args():
+    """
+    Inputs are introduced through command line
+    Args:
+        None
+    Inputs:
+        --pedigreeFile path to the PED file
+        --resultsDirectory save results to this directory
+        --engine selection engine, lineage (founders and monoparental lineages) or mis (maximum independent set)
+        --exactLimit largest family size solved exactly by the mis engine
+        --timeLimit seconds allowed to the mis engine for each family
+        --workers number of worker processes used to select and graph the families
+        --chunksize stream the PED file one family at a time, processing batches of about this many rows
+        --outputFormat format of the annotated PED file, ped, ped.gz or parquet
+        --renderJobs maximum number of concurrent dot processes
+        --dotOnly only write the DOT sources of the pedigree graphs
+        --view open every rendered pedigree graph
+        --renderMinSize only graph families with at least this many individuals
+        --renderMaxSize only graph families with at most this many individuals
+        --renderStatus only graph families with at least one individual with this selection_status
+        --incremental only select and graph again the families that changed since the previous run
+        --maxKinship select on kinship coefficients, allowing at most this kinship between selected individuals
+        --profile record the time and peak memory of every stage and family in profile_report.json
+        --noGraphs only select and annotate the families, without graphing them
+        --seed seed of the random choices, selections are reproducible when it is set
+        --tieBreak how one individual is chosen from each monoparental lineage
+        --preferredAff aff status preferred by the aff tie-break
+        --cache directory of a binary copy of the PED file and its index, memory-mapped by later runs
+        --graphMaxNodes graph families with more individuals around their selected individuals only
+        --graphDepth largest number of links between a graphed individual and a selected individual in large families
+        --repair repair the issues found by the validation before selecting
+        --missingnessColumn column whose lowest value is preferred by the missing tie-break
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pedigreeFile', default = "test_pedigree.ped",  type = str,
+                        help = 'path to the PED file')
+    parser.add_argument('--resultsDirectory', type = str, default = 'results/',
+                        help = 'save results to this directory')
+    parser.add_argument('--engine', type = str, default = 'lineage', choices = ['lineage', 'mis'],
+                        help = 'selection engine, lineage (founders and monoparental lineages) or mis (maximum independent set)')
+    parser.add_argument('--exactLimit', type = int, default = 64,
+                        help = 'largest family size solved exactly by the mis engine')
+    parser.add_argument('--timeLimit', type = float, default = 1.0,
+                        help = 'seconds allowed to the mis engine for each family')
+    parser.add_argument('--workers', type = int, default = 1,
+                        help = 'number of worker processes used to select and graph the families')
+    parser.add_argument('--chunksize', type = int, default = 0,
+                        help = 'stream the PED file one family at a time, processing batches of about this many rows')
+    parser.add_argument('--outputFormat', type = str, default = 'ped', choices = ['ped', 'ped.gz', 'parquet'],
+                        help = 'format of the annotated PED file, ped, ped.gz or parquet')
+    parser.add_argument('--renderJobs', type = int, default = None,
+                        help = 'maximum number of concurrent dot processes')
+    parser.add_argument('--dotOnly', action = 'store_true',
+                        help = 'only write the DOT sources of the pedigree graphs')
+    parser.add_argument('--view', action = 'store_true',
+                        help = 'open every rendered pedigree graph')
+    parser.add_argument('--renderMinSize', type = int, default = None,
+                        help = 'only graph families with at least this many individuals')
+    parser.add_argument('--renderMaxSize', type = int, default = None,
+                        help = 'only graph families with at most this many individuals')
+    parser.add_argument('--renderStatus', type = int, default = None, choices = [0, 2],
+                        help = 'only graph families with at least one individual with this selection_status')
+    parser.add_argument('--incremental', action = 'store_true',
+                        help = 'only select and graph again the families that changed since the previous run')
+    parser.add_argument('--maxKinship', type = float, default = None,
+                        help = 'select on kinship coefficients, allowing at most this kinship between selected individuals')
+    parser.add_argument('--profile', action = 'store_true',
+                        help = 'record the time and peak memory of every stage and family in profile_report.json')
+    parser.add_argument('--noGraphs', action = 'store_true',
+                        help = 'only select and annotate the families, without graphing them')
+    parser.add_argument('--seed', type = int, default = None,
+                        help = 'seed of the random choices, selections are reproducible when it is set')
+    parser.add_argument('--tieBreak', type = str, default = 'random', choices = ['random', 'generation', 'aff', 'missing'],
+                        help = 'how one individual is chosen from each monoparental lineage: at random, from the deepest generation, with the preferred aff status or with the lowest value of the missingness column')
+    parser.add_argument('--preferredAff', type = int, default = 2,
+                        help = 'aff status preferred by the aff tie-break')
+    parser.add_argument('--cache', type = str, default = None,
+                        help = 'directory of a binary copy of the PED file and its index, memory-mapped by later runs')
+    parser.add_argument('--graphMaxNodes', type = int, default = None,
+                        help = 'graph families with more individuals around their selected individuals only, collapsing the others into summary nodes')
+    parser.add_argument('--graphDepth', type = int, default = 2,
+                        help = 'largest number of links between a graphed individual and a selected individual in large families')
+    parser.add_argument('--repair', action = 'store_true',
+                        help = 'repair the issues found by the validation before selecting: drop duplicated rows, add missing parents as founders, remove self parent links and the link closing every cycle and fix parent sexes')
+    parser.add_argument('--missingnessColumn', type = str, default = None,
+                        help = 'column whose lowest value is preferred by the missing tie-break, such as a genotype missing rate, individuals without a value come last')
+    argsParse = parser.parse_args()
+    if argsParse.outputFormat == "parquet" and argsParse.chunksize > 0:
+        parser.error("--outputFormat parquet can not be combined with --chunksize")
+    if argsParse.cache is not None and argsParse.chunksize > 0:
+        parser.error("--cache can not be combined with --chunksize")
+    if argsParse.tieBreak == "missing" and argsParse.missingnessColumn is None:
+        parser.error("--tieBreak missing requires --missingnessColumn")
+    return argsParse
+
+def main():
+    argsParse = get_input_args()
+    run_pipeline(**vars(argsParse))
+
+if __name__ == "__main__":
+    main()
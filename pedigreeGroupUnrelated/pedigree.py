@@ -0,0 +1,1671 @@
+import numpy as np
+import pandas as pd
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from functools import partial
+from random import Random
+
+from .profiling import add_profile_record, new_profiler, profile_stage
+
+
+def compact_dtypes(PED):
+    """
+    Downcasts the id, fid and mid columns to the smallest integer type that holds the three of them, and the sex column
+    to the smallest integer type that holds it. Non integer columns are left untouched.
+    Args:
+      minimum:
+          PED: A PED file with the 'id', 'fid', 'mid' and 'sex' columns.
+    Returns:
+        The PED file with compact integer columns.
+    """
+    idColumns = [column for column in ["id", "fid", "mid"] if pd.api.types.is_integer_dtype(PED[column])]
+    if len(idColumns) == 3:
+        idType = np.result_type(*[pd.to_numeric(PED[column], downcast = "integer").dtype for column in idColumns])
+        for column in idColumns:
+            PED[column] = PED[column].astype(idType)
+    if pd.api.types.is_integer_dtype(PED["sex"]):
+        PED["sex"] = pd.to_numeric(PED["sex"], downcast = "integer")
+    return(PED)
+
+def scan_families(pedigreeFile, chunksize = 1000000):
+    """
+    Reads only the famid column of a PED file, in chunks, to find the size of every family and whether the rows of
+    each family are contiguous.
+    Args:
+      minimum:
+          pedigreeFile: path to the PED file.
+      optional:
+          chunksize: number of rows read at once.
+    Returns:
+        familySizes: a dictionary with the number of rows of each family, in order of first appearance.
+        contiguous: True if every family is written in one contiguous block of rows.
+    """
+    familySizes = {}
+    contiguous = True
+    previous = None
+    for chunk in pd.read_csv(pedigreeFile, sep = '\t', usecols = ["famid"], chunksize = chunksize):
+        famid = chunk["famid"].to_numpy()
+        if len(famid) == 0:
+            continue
+        runStarts = np.flatnonzero(np.r_[True, famid[1:] != famid[:-1]])
+        runFamilies = famid[runStarts].tolist()
+        runSizes = np.diff(np.r_[runStarts, len(famid)]).tolist()
+        for family, size in zip(runFamilies, runSizes):
+            if family in familySizes and family != previous:
+                contiguous = False
+            familySizes[family] = familySizes.get(family, 0) + size
+            previous = family
+    return(familySizes, contiguous)
+
+def read_ped_families(pedigreeFile, chunksize = 1000000):
+    """
+    Streams a PED file one family at a time, so that peak memory is bounded by the largest family instead of by the
+    whole file. Files where the rows of every family are contiguous are read in a single pass. Otherwise the rows are
+    first spilled, in chunks, to temporary bucket files that hold consecutive families, and each bucket is read back
+    alone. Families are yielded in order of first appearance and the rows of each family keep the PED order.
+    Args:
+      minimum:
+          pedigreeFile: path to the PED file. The column name of the data corresponding to the family ID must be
+          'famid', likewise the individual ID must be 'id', father ID must be set as 'fid', mother ID as 'mid' and sex
+          as 'sex'.
+      optional:
+          chunksize: number of rows read at once.
+    Yields:
+        The family ID and the PED rows of the family, with compact integer dtypes, indexed by their row number in the
+        PED file.
+    """
+    familySizes, contiguous = scan_families(pedigreeFile, chunksize)
+    if contiguous:
+        pieces = []
+        for chunk in pd.read_csv(pedigreeFile, sep = '\t', chunksize = chunksize):
+            famid = chunk["famid"].to_numpy()
+            runStarts = np.flatnonzero(np.r_[True, famid[1:] != famid[:-1]]).tolist()
+            for start, stop in zip(runStarts, runStarts[1:] + [len(chunk)]):
+                if len(pieces) > 0 and pieces[0]["famid"].iloc[0] != famid[start]:
+                    yield pieces[0]["famid"].iloc[0], compact_dtypes(pd.concat(pieces))
+                    pieces = []
+                pieces.append(chunk.iloc[start:stop])
+        if len(pieces) > 0:
+            yield pieces[0]["famid"].iloc[0], compact_dtypes(pd.concat(pieces))
+        return
+    #consecutive families are packed in buckets, the row number of every row is spilled as the first column of about chunksize rows, a larger family gets a bucket of its own
+    familyBucket = {}
+    bucket = 0
+    bucketSize = 0
+    for family in familySizes:
+        if bucketSize > 0 and bucketSize + familySizes[family] > chunksize:
+            bucket += 1
+            bucketSize = 0
+        familyBucket[family] = bucket
+        bucketSize += familySizes[family]
+    with tempfile.TemporaryDirectory() as spillDir:
+        header = None
+        for chunk in pd.read_csv(pedigreeFile, sep = '\t', chunksize = chunksize):
+            header = chunk.columns
+            buckets = chunk["famid"].map(familyBucket).to_numpy()
+            for e in pd.unique(buckets).tolist():
+                chunk[buckets == e].to_csv(os.path.join(spillDir, str(e) + '.ped'), sep = '\t', index = True,
+                                           header = False, mode = 'a')
+        for e in range(0, bucket + 1):
+            spillFile = os.path.join(spillDir, str(e) + '.ped')
+            if not os.path.exists(spillFile):
+                continue
+            bucketPED = pd.read_csv(spillFile, sep = '\t', header = None, names = [None] + list(header), index_col = 0)
+            bucketPED.index.name = None
+            os.remove(spillFile)
+            for family, familyPED in bucketPED.groupby("famid", sort = False):
+                yield family, compact_dtypes(familyPED)
+
+PEDIGREE_CACHE_VERSION = 3
+
+def compact_integers(values, bound = None):
+    """
+    Downcasts an integer array to the smallest signed integer type that holds it, and bound when given, other arrays are
+    left untouched.
+    """
+    if values.dtype.kind in "iu" and len(values) > 0:
+        if bound is not None:
+            return(values.astype(np.promote_types(np.min_scalar_type(-bound), np.min_scalar_type(values.max()))))
+        return(pd.to_numeric(values, downcast = "integer"))
+    return(values)
+
+def load_npy(path):
+    """
+    Memory-maps a .npy file. Arrays of Python objects, such as string IDs, can not be mapped and are read whole.
+    """
+    try:
+        return(np.load(path, mmap_mode = 'r'))
+    except ValueError:
+        return(np.load(path, allow_pickle = True))
+
+def source_signature(pedigreeFile):
+    """
+    Identifies the version of a PED file by its absolute path, size and modification time.
+    """
+    stat = os.stat(pedigreeFile)
+    return({"path": os.path.abspath(pedigreeFile), "size": stat.st_size, "mtime": stat.st_mtime_ns})
+
+def save_pedigree_cache(PED, pedigreeIndex, cacheDir, pedigreeFile):
+    """
+    Writes a PED file and its pedigree index as a directory of .npy files, one per column and per index array, plus a
+    meta.json file that records the columns, the index entries and the signature of the PED file. Integer columns are
+    compacted with the compact_dtypes function and the other integer columns are stored with the smallest integer type
+    that holds them. The offsets and child pointers are kept as int64, and the other index arrays, which hold positions,
+    use a type that also holds the number of rows plus one, so arithmetic on positions can not overflow.
+    Args:
+      minimum:
+          PED: A PED file.
+          pedigreeIndex: The output of the build_pedigree_index function, built from the same PED file.
+          cacheDir: Directory of the cache, created when missing.
+          pedigreeFile: path of the PED file, whose signature is recorded.
+    """
+    os.makedirs(cacheDir, exist_ok = True)
+    PED = compact_dtypes(PED.copy())
+    for column in PED.columns:
+        values = PED[column].to_numpy()
+        if column not in ["id", "fid", "mid"]:
+            values = compact_integers(values)
+        np.save(os.path.join(cacheDir, 'ped_' + str(column) + '.npy'), values, allow_pickle = values.dtype == object)
+    entries = []
+    for entry, values in pedigreeIndex.items():
+        if entry == "familyPosition" or values is None:
+            continue
+        if entry in ["offsets", "childPtr"]:
+            values = np.asarray(values, dtype = np.int64)
+        else:
+            values = compact_integers(np.asarray(values), len(PED) + 1)
+        np.save(os.path.join(cacheDir, 'index_' + entry + '.npy'), values, allow_pickle = values.dtype == object)
+        entries.append(entry)
+    meta = {"version": PEDIGREE_CACHE_VERSION, "source": source_signature(pedigreeFile),
+            "columns": [str(column) for column in PED.columns], "index": entries}
+    with open(os.path.join(cacheDir, 'meta.json'), 'w') as metaFile:
+        json.dump(meta, metaFile)
+
+def load_pedigree_cache(cacheDir, pedigreeFile = None):
+    """
+    Memory-maps a cache written by the save_pedigree_cache function. Loading only reads meta.json and the .npy headers,
+    the data are paged in by the operating system when used and the pages are shared by every process that maps the
+    same cache. Columns of Python objects, such as string IDs, can not be mapped and are read whole.
+    Args:
+      minimum:
+          cacheDir: Directory of the cache.
+      optional:
+          pedigreeFile: path of the PED file. When given, the cache is only used if it was built from this version of
+          the file.
+    Returns:
+        The PED file, as a DataFrame of read only memory-mapped columns, and its pedigree index, or None when the cache
+        is missing or outdated.
+    """
+    metaPath = os.path.join(cacheDir, 'meta.json')
+    if not os.path.exists(metaPath):
+        return(None)
+    with open(metaPath) as metaFile:
+        meta = json.load(metaFile)
+    if meta.get("version") != PEDIGREE_CACHE_VERSION:
+        return(None)
+    if pedigreeFile is not None and meta["source"] != source_signature(pedigreeFile):
+        return(None)
+    columns = {}
+    for column in meta["columns"]:
+        columns[column] = load_npy(os.path.join(cacheDir, 'ped_' + column + '.npy'))
+    PED = pd.DataFrame(columns, copy = False)
+    pedigreeIndex = {"aff": None}
+    for entry in meta["index"]:
+        pedigreeIndex[entry] = load_npy(os.path.join(cacheDir, 'index_' + entry + '.npy'))
+    pedigreeIndex["families"] = pedigreeIndex["families"].tolist()
+    return(PED, pedigreeIndex)
+
+def load_cache_index(cacheDir):
+    """
+    Memory-maps the pedigree index of a cache written by the save_pedigree_cache function, without the PED columns and
+    the family IDs. Process pool tasks use it to read their families from the cache, given their offsets, instead of
+    receiving a copy of them.
+    Args:
+      minimum:
+          cacheDir: Directory of a cache, checked by the load_pedigree_cache function.
+    Returns:
+        The pedigree index, without the families entry.
+    """
+    with open(os.path.join(cacheDir, 'meta.json')) as metaFile:
+        meta = json.load(metaFile)
+    pedigreeIndex = {"aff": None}
+    for entry in meta["index"]:
+        if entry != "families":
+            pedigreeIndex[entry] = load_npy(os.path.join(cacheDir, 'index_' + entry + '.npy'))
+    return(pedigreeIndex)
+
+def cached_pedigree(pedigreeFile, cacheDir):
+    """
+    Reads a PED file through its binary cache. The cache is built from the PED file on the first run, and again
+    whenever the PED file changes.
+    Args:
+      minimum:
+          pedigreeFile: path to the PED file.
+          cacheDir: Directory of the cache.
+    Returns:
+        The PED file and its pedigree index, as in the load_pedigree_cache function.
+    """
+    cached = load_pedigree_cache(cacheDir, pedigreeFile)
+    if cached is None:
+        PED = pd.read_csv(pedigreeFile, sep = '\t')
+        save_pedigree_cache(PED, build_pedigree_index(PED), cacheDir, pedigreeFile)
+        cached = load_pedigree_cache(cacheDir, pedigreeFile)
+    return(cached)
+
+def family_slices(famCodes, mask):
+    """
+    Groups the rows selected by a mask by family in one pass. Rows are ordered with a stable sort, so within each family
+    the original PED order is kept.
+    Args:
+      minimum:
+          famCodes: integer family codes for every row of the PED file, as returned by pandas.factorize.
+          mask: boolean array selecting the rows to group.
+    Returns:
+        rows: the positions of the selected rows, grouped by family.
+        slices: a list of [family code, start, stop] entries delimiting each family inside rows.
+    """
+    rows = np.flatnonzero(mask)
+    rows = rows[np.argsort(famCodes[rows], kind = "stable")]
+    groupCodes, groupStarts = np.unique(famCodes[rows], return_index = True)
+    groupStops = groupStarts[1:].tolist() + [len(rows)]
+    slices = [[famCode, start, stop] for famCode, start, stop in zip(groupCodes.tolist(), groupStarts.tolist(), groupStops)]
+    return(rows, slices)
+
+def less_related(PED):
+    """
+    Groups the individuals with no registered ascendants in the group asc_none and the individuals with
+    one ascendant in the group asc_one.
+    Args:
+      minimum:
+          PED: A PED file is required. The column name of the data corresponding to the family ID must be
+          'famid', likewise the individual ID must be 'id', father ID must be set as 'fid', mother ID as 'mid' and sex
+          as 'sex'.
+    Returns:
+      A dictionary that has as index each family ID. Each dictionary entry contains a dictionary with the asc_none group
+      and the asc_one group. asc_none is a list and asc_one is a dictionary that contains a list of the ascendants for every
+      individual with one valid ascendant.
+    """
+    famid = PED["famid"].to_numpy()
+    ids = PED["id"].to_numpy()
+    fid = PED["fid"].to_numpy()
+    mid = PED["mid"].to_numpy()
+    noneMask = (fid == 0) & (mid == 0)
+    oneMask = (fid == 0) != (mid == 0)
+    #families are coded in order of appearance so the output keeps the PED order
+    famCodes, famUniques = pd.factorize(famid)
+    famUniques = famUniques.tolist()
+    database = {}
+    for famCode in pd.unique(famCodes[noneMask | oneMask]):
+        database[famUniques[famCode]] = {"asc_none": [], "asc_one": {}}
+    rows, slices = family_slices(famCodes, noneMask)
+    noneIDs = ids[rows].tolist()
+    for famCode, start, stop in slices:
+        database[famUniques[famCode]]["asc_none"] = noneIDs[start:stop]
+    rows, slices = family_slices(famCodes, oneMask)
+    oneIDs = ids[rows].tolist()
+    oneAscendants = [[f, m] for f, m in zip(fid[rows].tolist(), mid[rows].tolist())]
+    for famCode, start, stop in slices:
+        database[famUniques[famCode]]["asc_one"] = dict(zip(oneIDs[start:stop], oneAscendants[start:stop]))
+    return(database)
+
+def build_pedigree_index(PED):
+    """
+    Builds, in one vectorized pass, a compact index of the parent/child links of every family. Individuals are coded
+    with integers inside their family, rows are grouped by family keeping the PED order, and children are stored in a
+    CSR layout (childPtr, children) so that the descendants of an individual are a contiguous slice.
+    Args:
+      minimum:
+          PED: A PED file is required. The column name of the data corresponding to the family ID must be
+          'famid', likewise the individual ID must be 'id', father ID must be set as 'fid', mother ID as 'mid' and sex
+          as 'sex'.
+    Returns:
+        A dictionary with the following entries:
+            families: the family IDs in order of appearance.
+            offsets: start of each family in the grouped arrays, families[k] spans offsets[k]:offsets[k + 1].
+            rows: position in the PED file of every grouped individual.
+            ids, sex: individual ID and sex of every grouped individual.
+            father, mother: integer code of the registered father and mother inside the family, -1 if unknown, missing
+            from the family or self-referenced.
+            nParents: number of non zero parent IDs, 0 for asc_none individuals and 1 for asc_one individuals.
+            lineageParent: code of the only registered ascendant of asc_one individuals, -1 otherwise.
+            childPtr, children: CSR child lists, the children codes of the grouped individual i are
+            children[childPtr[i]:childPtr[i + 1]].
+            aff: aff status of every grouped individual, None when the PED file has no aff column.
+        The missing entry used by the missing tie-break is added with the missingness_index function.
+    """
+    famCodes, famUniques = pd.factorize(PED["famid"].to_numpy())
+    rows = np.argsort(famCodes, kind = "stable")
+    famCodes = famCodes[rows]
+    offsets = np.searchsorted(famCodes, np.arange(len(famUniques) + 1))
+    ids = PED["id"].to_numpy()[rows]
+    fid = PED["fid"].to_numpy()[rows]
+    mid = PED["mid"].to_numpy()[rows]
+    #(famid, id) keys, the first occurrence wins when an ID is duplicated
+    keys = pd.MultiIndex.from_arrays([famCodes, ids])
+    firsts = np.flatnonzero(~keys.duplicated())
+    keys = keys[firsts]
+    start = offsets[famCodes]
+    position = np.arange(len(rows))
+    parents = []
+    for parentIDs in [fid, mid]:
+        found = keys.get_indexer(pd.MultiIndex.from_arrays([famCodes, parentIDs]))
+        parentCode = np.where(found >= 0, firsts[np.maximum(found, 0)], -1)
+        parentCode[(parentIDs == 0) | (parentCode == position)] = -1
+        parents.append(np.where(parentCode >= 0, parentCode - start, -1))
+    father, mother = parents
+    nParents = (fid != 0).astype(np.int8) + (mid != 0).astype(np.int8)
+    lineageParent = np.where(nParents == 1, np.maximum(father, mother), -1)
+    #CSR child lists, edges are sorted by parent and then by child
+    mother = np.where(mother == father, -1, mother)
+    edgeParent = np.concatenate([father, mother])
+    edgeChild = np.concatenate([position, position])
+    valid = edgeParent >= 0
+    edgeChild = edgeChild[valid]
+    edgeParent = edgeParent[valid] + start[edgeChild]
+    order = np.lexsort((edgeChild, edgeParent))
+    childPtr = np.concatenate([[0], np.cumsum(np.bincount(edgeParent, minlength = len(rows)))])
+    children = edgeChild[order] - start[edgeChild[order]]
+    aff = PED["aff"].to_numpy()[rows] if "aff" in PED.columns else None
+    return({"families": famUniques.tolist(), "offsets": offsets, "rows": rows, "ids": ids,
+            "sex": PED["sex"].to_numpy()[rows], "father": parents[0], "mother": parents[1], "nParents": nParents,
+            "lineageParent": lineageParent, "childPtr": childPtr, "children": children, "aff": aff})
+
+def missingness_index(PED, pedigreeIndex, missingnessColumn):
+    """
+    Reads the missingness of every grouped individual from a column of the PED file, such as a genotype missing rate,
+    for the missing tie-break.
+    Args:
+      minimum:
+          PED: A PED file.
+          pedigreeIndex: The output of the build_pedigree_index function, built from the same PED file. Its missing
+          entry is set.
+          missingnessColumn: name of the numeric column, lower values are preferred. Individuals without a value are
+          taken as the most missing.
+    """
+    if missingnessColumn not in PED.columns:
+        raise ValueError("The missingness column " + str(missingnessColumn) + " is not a column of the PED file.")
+    missing = pd.to_numeric(PED[missingnessColumn]).to_numpy(dtype = np.float64)[pedigreeIndex["rows"]]
+    missing[np.isnan(missing)] = np.inf
+    pedigreeIndex["missing"] = missing
+
+def family_offsets(pedigreeIndex, family):
+    """
+    Looks up the first and last plus one position of a family in the arrays of the output of build_pedigree_index.
+    """
+    if "familyPosition" not in pedigreeIndex:
+        pedigreeIndex["familyPosition"] = {e: i for i, e in enumerate(pedigreeIndex["families"])}
+    k = pedigreeIndex["familyPosition"][family]
+    return([int(pedigreeIndex["offsets"][k]), int(pedigreeIndex["offsets"][k + 1])])
+
+def family_index(pedigreeIndex, family, offsets = None):
+    """
+    Extracts the index of one family from the output of build_pedigree_index. Arrays are views of the shared index,
+    except the child pointers, which are rebased to start at zero.
+    Args:
+      minimum:
+          pedigreeIndex: The output of the build_pedigree_index function, or of the load_cache_index function when
+          offsets is given.
+          family: a valid family ID.
+      optional:
+          offsets: The output of the family_offsets function for the family, looked up when not given.
+    Returns:
+        A dictionary with the same entries as the pedigree index restricted to the family, plus family (the family ID)
+        and position (a dictionary from individual ID to its integer code).
+    """
+    if offsets is None:
+        offsets = family_offsets(pedigreeIndex, family)
+    start, stop = offsets
+    childPtr = pedigreeIndex["childPtr"][start:stop + 1]
+    familyIndex = {"family": family}
+    for entry in ["rows", "ids", "sex", "father", "mother", "nParents", "lineageParent", "aff", "missing"]:
+        if pedigreeIndex.get(entry) is not None:
+            familyIndex[entry] = pedigreeIndex[entry][start:stop]
+    familyIndex["childPtr"] = childPtr - childPtr[0]
+    familyIndex["children"] = pedigreeIndex["children"][childPtr[0]:childPtr[-1]]
+    familyIndex["position"] = {}
+    for i, e in enumerate(familyIndex["ids"].tolist()):
+        familyIndex["position"].setdefault(e, i)
+    return(familyIndex)
+
+def pedigree_cycles(pedigreeIndex, closing = False):
+    """
+    Finds the individuals that are their own ancestor. Individuals without registered parents are peeled off, then their
+    children once all their parents are peeled, and so on, one whole generation per vectorized step. What remains are
+    the individuals on a cycle and their descendants, which are then peeled the same way from the other side, starting
+    from the individuals without children. The few remaining individuals, on a cycle or on a path between two cycles,
+    are split into strongly connected components with Tarjan's algorithm. Every individual and link is processed a
+    bounded number of times, so the time is linear in the size of the pedigree.
+    Args:
+      minimum:
+          pedigreeIndex: The output of the build_pedigree_index function.
+      optional:
+          closing: also return the links that close the cycles, the links of the depth first search of Tarjan's
+          algorithm that lead back to an individual of the current path. Removing them breaks every cycle, and a
+          single cycle is broken by removing one link.
+    Returns:
+        The positions, in the grouped arrays of the pedigree index, of the individuals on a cycle, and when closing is
+        set, an array of [parent, child] positions of the closing links.
+    """
+    offsets = pedigreeIndex["offsets"]
+    childPtr = pedigreeIndex["childPtr"]
+    size = len(pedigreeIndex["ids"])
+    start = np.repeat(offsets[:-1], np.diff(offsets))
+    edgeParent = np.repeat(np.arange(size), np.diff(childPtr))
+    edgeChild = pedigreeIndex["children"] + start[edgeParent]
+    remaining = np.ones(size, dtype = bool)
+    for source, target in [[edgeParent, edgeChild], [edgeChild, edgeParent]]:
+        kept = remaining[source] & remaining[target]
+        order = np.argsort(source[kept], kind = "stable")
+        source, target = source[kept][order], target[kept][order]
+        pointer = np.concatenate([[0], np.cumsum(np.bincount(source, minlength = size))])
+        degree = np.bincount(target, minlength = size)
+        frontier = np.flatnonzero(remaining & (degree == 0))
+        while len(frontier) > 0:
+            remaining[frontier] = False
+            counts = pointer[frontier + 1] - pointer[frontier]
+            edges = np.repeat(pointer[frontier] - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            reached, hits = np.unique(target[edges], return_counts = True)
+            degree[reached] -= hits
+            frontier = reached[degree[reached] == 0]
+    kept = remaining[edgeParent] & remaining[edgeChild]
+    links = {}
+    for parent, child in zip(edgeParent[kept].tolist(), edgeChild[kept].tolist()):
+        links.setdefault(parent, []).append(child)
+    order = {}
+    low = {}
+    stack = []
+    onStack = set()
+    onPath = set()
+    cyclic = []
+    closingLinks = []
+    for root in np.flatnonzero(remaining).tolist():
+        if root in order:
+            continue
+        work = [[root, 0]]
+        while len(work) > 0:
+            node, k = work.pop()
+            if k == 0:
+                order[node] = low[node] = len(order)
+                stack.append(node)
+                onStack.add(node)
+                onPath.add(node)
+            children = links.get(node, [])
+            if k < len(children):
+                work.append([node, k + 1])
+                if children[k] not in order:
+                    work.append([children[k], 0])
+                elif children[k] in onStack:
+                    low[node] = min(low[node], order[children[k]])
+                    if children[k] in onPath:
+                        closingLinks.append([node, children[k]])
+                continue
+            onPath.discard(node)
+            if len(work) > 0:
+                low[work[-1][0]] = min(low[work[-1][0]], low[node])
+            if low[node] == order[node]:
+                component = []
+                while len(component) == 0 or component[-1] != node:
+                    component.append(stack.pop())
+                    onStack.discard(component[-1])
+                if len(component) > 1:
+                    cyclic.extend(component)
+    cyclic = np.array(sorted(cyclic), dtype = np.int64)
+    if closing:
+        return(cyclic, np.array(closingLinks, dtype = np.int64).reshape(-1, 2))
+    return(cyclic)
+
+VALIDATION_CHECKS = ["duplicate_id", "unknown_sex", "self_father", "self_mother", "missing_father", "missing_mother",
+                     "father_sex", "mother_sex", "same_parents", "cycle"]
+
+def validate_pedigree(PED, pedigreeIndex = None):
+    """
+    Checks the integrity of a PED file with vectorized operations over the pedigree index:
+        duplicate_id: the (famid, id) pair was already used by a previous row, which is ignored by the other steps.
+        unknown_sex: sex is neither 1 nor 2.
+        self_father, self_mother: the individual is its own father or mother.
+        missing_father, missing_mother: the father or mother ID is not an individual of the family.
+        father_sex, mother_sex: the father is not male (1) or the mother is not female (2).
+        same_parents: fid and mid are the same ID.
+        cycle: the individual is its own ancestor, found with the pedigree_cycles function.
+    Args:
+      minimum:
+          PED: A PED file.
+      optional:
+          pedigreeIndex: The output of the build_pedigree_index function, built from the same PED file. It is built
+          when not given.
+    Returns:
+        A DataFrame with one row per issue, sorted by PED row: famid, id, row (position in the given PED file, which is
+        a batch of families when the file is streamed), check (one of VALIDATION_CHECKS) and detail.
+    """
+    if pedigreeIndex is None:
+        pedigreeIndex = build_pedigree_index(PED)
+    rows = pedigreeIndex["rows"]
+    offsets = pedigreeIndex["offsets"]
+    start = np.repeat(offsets[:-1], np.diff(offsets))
+    ids = pedigreeIndex["ids"]
+    sex = pedigreeIndex["sex"]
+    famid = PED["famid"].to_numpy()[rows]
+    parentIDs = {"father": PED["fid"].to_numpy()[rows], "mother": PED["mid"].to_numpy()[rows]}
+    found = []
+    duplicated = pd.MultiIndex.from_arrays([np.repeat(np.arange(len(offsets) - 1), np.diff(offsets)), ids]).duplicated()
+    found.append(["duplicate_id", np.flatnonzero(duplicated), "id already used in the family"])
+    found.append(["unknown_sex", np.flatnonzero((sex != 1) & (sex != 2)), "sex is neither 1 nor 2"])
+    for role, column, expected in [["father", "fid", 1], ["mother", "mid", 2]]:
+        parentCode = pedigreeIndex[role]
+        registered = (parentIDs[role] != 0) & (parentIDs[role] == parentIDs[role])
+        selfParent = registered & (parentIDs[role] == ids)
+        found.append(["self_" + role, np.flatnonzero(selfParent), column + " is the id of the individual"])
+        found.append(["missing_" + role, np.flatnonzero(registered & ~selfParent & (parentCode == -1)),
+                      column + " is not an individual of the family"])
+        withParent = np.flatnonzero(parentCode != -1)
+        wrongSex = withParent[sex[start[withParent] + parentCode[withParent]] != expected]
+        found.append([role + "_sex", wrongSex, "the " + role + " does not have sex " + str(expected)])
+    sameParents = (parentIDs["father"] != 0) & (parentIDs["father"] == parentIDs["mother"])
+    found.append(["same_parents", np.flatnonzero(sameParents), "fid and mid are the same id"])
+    found.append(["cycle", pedigree_cycles(pedigreeIndex), "the individual is its own ancestor"])
+    positions = np.concatenate([positions for check, positions, detail in found]).astype(np.int64)
+    report = pd.DataFrame({"famid": famid[positions], "id": ids[positions], "row": rows[positions],
+                           "check": np.repeat([check for check, positions, detail in found],
+                                              [len(positions) for check, positions, detail in found]),
+                           "detail": np.repeat([detail for check, positions, detail in found],
+                                               [len(positions) for check, positions, detail in found])})
+    return(report.sort_values("row", kind = "stable").reset_index(drop = True))
+
+def repair_pedigree(PED, pedigreeIndex = None):
+    """
+    Validates a PED file with the validate_pedigree function and repairs what can be repaired:
+        duplicate_id: the row is dropped.
+        self_father, self_mother: the parent is set to 0.
+        cycle: the parent is set to 0 for the links that close the cycles, found with the pedigree_cycles function, so
+        one link is removed from each simple cycle.
+        missing_father, missing_mother: the parent is added as a founder of the family, with the sex of its role, so
+        that its children stay related.
+        father_sex, mother_sex: fid and mid are swapped when both parents have the sex of the other role, and a parent
+        with an unknown sex gets the sex of its role.
+        same_parents: the parent is kept in the role of its sex, or as the father when it is missing or of unknown sex,
+        and the other role is set to 0.
+        unknown_sex: only repaired for parents, as above.
+    Args:
+      minimum:
+          PED: A PED file.
+      optional:
+          pedigreeIndex: The output of the build_pedigree_index function, built from the same PED file.
+    Returns:
+        The repaired PED file, with the added founders at the end, and the validation report with an action column
+        describing the repair of every issue, empty when it was not repaired.
+    """
+    if pedigreeIndex is None:
+        pedigreeIndex = build_pedigree_index(PED)
+    report = validate_pedigree(PED, pedigreeIndex)
+    report["action"] = ""
+    if len(report) == 0:
+        return(PED, report)
+    fid = PED["fid"].to_numpy().copy()
+    mid = PED["mid"].to_numpy().copy()
+    sex = PED["sex"].to_numpy().copy()
+    famid = PED["famid"].to_numpy()
+    rowOf = np.empty(len(PED), dtype = np.int64)
+    rowOf[pedigreeIndex["rows"]] = np.arange(len(PED))
+    offsets = pedigreeIndex["offsets"]
+    start = np.repeat(offsets[:-1], np.diff(offsets))
+    #PED row of the father and mother of every row, -1 when not found
+    parentRows = {}
+    for role in ["father", "mother"]:
+        grouped = pedigreeIndex[role][rowOf]
+        parentRows[role] = np.where(grouped != -1, pedigreeIndex["rows"][start[rowOf] + np.maximum(grouped, 0)], -1)
+    checks = report["check"].to_numpy()
+    issueRows = report["row"].to_numpy()
+    actions = report["action"].to_numpy(dtype = object)
+    def issues(check):
+        return(np.flatnonzero(checks == check))
+    #duplicated rows
+    k = issues("duplicate_id")
+    dropped = issueRows[k]
+    actions[k] = "row dropped"
+    #self parenting
+    for role, column, values in [["father", "fid", fid], ["mother", "mid", mid]]:
+        k = issues("self_" + role)
+        values[issueRows[k]] = 0
+        actions[k] = column + " set to 0"
+    #cycles, only the links that close them are removed
+    k = issues("cycle")
+    if len(k) > 0:
+        closingParent, closingChild = pedigree_cycles(pedigreeIndex, closing = True)[1].T
+        closingParent = pedigreeIndex["rows"][closingParent]
+        closingChild = pedigreeIndex["rows"][closingChild]
+        for role, column, values in [["father", "fid", fid], ["mother", "mid", mid]]:
+            broken = parentRows[role][closingChild] == closingParent
+            values[closingChild[broken]] = 0
+            broken = k[np.isin(issueRows[k], closingChild[broken])]
+            actions[broken] = np.where(actions[broken] == "", column + " set to 0", actions[broken] + ", " + column +
+                                       " set to 0")
+    #same parent as father and mother
+    k = issues("same_parents")
+    parent = parentRows["father"][issueRows[k]]
+    keepMother = (parent != -1) & (sex[np.maximum(parent, 0)] == 2)
+    mid[issueRows[k][~keepMother]] = 0
+    fid[issueRows[k][keepMother]] = 0
+    actions[k] = np.where(keepMother, "fid set to 0", "mid set to 0")
+    #parents of the wrong sex, swapped roles or unknown sex
+    fatherIssues = issues("father_sex")
+    motherIssues = issues("mother_sex")
+    swapped = np.intersect1d(issueRows[fatherIssues], issueRows[motherIssues])
+    swapped = swapped[(sex[parentRows["father"][swapped]] == 2) & (sex[parentRows["mother"][swapped]] == 1)]
+    fid[swapped], mid[swapped] = mid[swapped].copy(), fid[swapped].copy()
+    actions[np.isin(issueRows, swapped) & ((checks == "father_sex") | (checks == "mother_sex"))] = "fid and mid swapped"
+    for role, roleIssues, expected in [["father", fatherIssues, 1], ["mother", motherIssues, 2]]:
+        roleIssues = roleIssues[actions[roleIssues] == ""]
+        parent = parentRows[role][issueRows[roleIssues]]
+        unknown = (sex[parent] != 1) & (sex[parent] != 2)
+        sex[parent[unknown]] = expected
+        actions[roleIssues[unknown]] = "parent sex set to " + str(expected)
+    for role, roleIssues in [["father", fatherIssues], ["mother", motherIssues]]:
+        parent = parentRows[role][issueRows[roleIssues]]
+        fixed = (sex[parent] == 1) | (sex[parent] == 2)
+        k = np.flatnonzero((checks == "unknown_sex") & np.isin(issueRows, parent[fixed]))
+        actions[k] = "sex set from the parent role"
+    #missing parents are added as founders
+    founders = []
+    for role, column, values, expected in [["father", "fid", fid, 1], ["mother", "mid", mid, 2]]:
+        k = issues("missing_" + role)
+        cleared = values[issueRows[k]] == 0
+        actions[k] = np.where(cleared, column + " set to 0", "founder added")
+        k = k[~cleared]
+        founders.append(pd.DataFrame({"famid": famid[issueRows[k]], "id": values[issueRows[k]], "sex": expected}))
+    report["action"] = actions
+    repaired = PED.copy()
+    repaired["fid"] = fid
+    repaired["mid"] = mid
+    repaired["sex"] = sex
+    repaired = repaired.drop(index = repaired.index[dropped])
+    founders = pd.concat(founders, ignore_index = True)
+    if len(founders) > 0:
+        roles = founders.groupby(["famid", "id"], sort = False)["sex"]
+        founders = roles.first().reset_index()
+        founders.loc[roles.nunique().to_numpy() > 1, "sex"] = 0
+        founders["fid"] = 0
+        founders["mid"] = 0
+        for column in repaired.columns:
+            if column not in founders.columns:
+                founders[column] = 0 if pd.api.types.is_integer_dtype(repaired[column]) else np.nan
+        founders = founders[repaired.columns].astype({column: repaired[column].dtype for column in repaired.columns
+                                                      if column not in ["famid", "id"]})
+        repaired = pd.concat([repaired, founders], ignore_index = True)
+    else:
+        repaired = repaired.reset_index(drop = True)
+    return(repaired, report)
+
+def write_validation_report(validationReport, save_dir, append = False):
+    """
+    Exports the report of the validate_pedigree or repair_pedigree function as validation_report.tsv, one row per
+    issue. The file is written even without issues, so that an empty report shows that the PED file was validated.
+    Args:
+      minimum:
+          validationReport: The output of the validate_pedigree or repair_pedigree function.
+          save_dir: Directory where to save results
+      optional:
+          append: append the issues, without header, to the report of the previous batches.
+    """
+    os.makedirs(save_dir, exist_ok = True)
+    reportPath = save_dir + 'validation_report.tsv'
+    if append and os.path.exists(reportPath):
+        validationReport.to_csv(reportPath, sep = '\t', index = False, header = False, mode = 'a')
+    else:
+        validationReport.to_csv(reportPath, sep = '\t', index = False)
+
+def lineage_links(lessRelatedDatabase, family, familyIndex = None):
+    """
+    Links every individual with only one valid ascendant to that ascendant, when the ascendant is itself in the asc_one
+    or the asc_none group. These single-parent links form a forest whose trees are the monoparental lineages.
+    Args:
+      minimum:
+          lessRelatedDatabase: The output of the less_related function.
+          family: a valid family ID.
+      optional:
+          familyIndex: The output of the family_index function for the family. When given, the links are read from
+          its lineageParent array.
+    Returns:
+      A dictionary with the asc_one individuals as keys and their linked ascendant as values, None when the ascendant is
+      not in the asc_one or the asc_none group.
+    """
+    if familyIndex is not None:
+        ids, nParents, lineageParent = familyIndex["ids"], familyIndex["nParents"], familyIndex["lineageParent"]
+        oneCodes = np.flatnonzero(nParents == 1)
+        parentCodes = lineageParent[oneCodes]
+        linked = (parentCodes != -1) & (nParents[np.maximum(parentCodes, 0)] <= 1)
+        parentIDs = [parent if valid else None for parent, valid in zip(ids[np.maximum(parentCodes, 0)].tolist(), linked.tolist())]
+        return(dict(zip(ids[oneCodes].tolist(), parentIDs)))
+    ascOne = lessRelatedDatabase[family]["asc_one"]
+    ascNone = set(lessRelatedDatabase[family]["asc_none"])
+    links = {}
+    for individual in ascOne:
+        father, mother = ascOne[individual]
+        direct_asc = father if father != 0 else mother
+        if direct_asc in ascOne or direct_asc in ascNone:
+            links[individual] = direct_asc
+        else:
+            links[individual] = None
+    return(links)
+
+def lineage_groups(lessRelatedDatabase, family, familyIndex = None, depths = False):
+    """
+    Resolves every monoparental lineage of a family at once. The top of each lineage is found iteratively and memoized,
+    so shared ancestor chains are walked only once and chains of any depth are supported. Single-parent cycles, which
+    only malformed PED files contain, are closed into one lineage.
+    Args:
+      minimum:
+          lessRelatedDatabase: The output of the less_related function.
+          family: a valid family ID.
+      optional:
+          familyIndex: The output of the family_index function for the family.
+          depths: also return the depth of every individual below the top of its lineage.
+    Returns:
+      A list of lineages in order of appearance of their asc_one individuals. Each lineage is a list of related
+      individuals, sorted from the top ascendant downwards, from which only one may be included in the final dataset.
+      With depths, a dictionary with the depth of every individual of the lineages is returned as well.
+    """
+    links = lineage_links(lessRelatedDatabase, family, familyIndex)
+    top = {}
+    depth = {}
+    for individual in links:
+        path = []
+        onPath = set()
+        e = individual
+        while e is not None and e not in top and e not in onPath:
+            path.append(e)
+            onPath.add(e)
+            e = links.get(e)
+        if e is not None and e in top:
+            topID, d = top[e], depth[e]
+        else:
+            topID, d = (path[-1] if e is None else e), -1
+        for node in reversed(path):
+            d += 1
+            top[node] = topID
+            depth[node] = d
+    groups = {}
+    for node in top:
+        groups.setdefault(top[node], []).append(node)
+    lineages = []
+    for topID in groups:
+        lineages.append(sorted(groups[topID], key = depth.get))
+    if depths:
+        return(lineages, depth)
+    return(lineages)
+
+def redundants(lessRelatedDatabase, family, individual, familyIndex = None):
+    """
+    Identifies groups of related individuals that can only be included interchangeably in the final dataset. This is
+    required in cases where various individuals in one lineage where individuals have only one registered ascendant, and the
+    final ascendant has no registered ascendants. The lineage is walked iteratively, so chains of any depth are supported.
+    Args:
+      minimum:
+          lessRelatedDatabase: The output of the less_related function.
+          family: a valid family ID.
+          individual: a valid individual with only one valid ascendant.
+      optional:
+          familyIndex: The output of the family_index function for the family. When given, the lineage is followed
+          through its lineageParent links instead of the lessRelatedDatabase lookups.
+    Returns:
+      A list of individuals that are genetically related and that only one of them may be included in the final dataset.
+    """
+    redundancies = [individual]
+    if familyIndex is not None:
+        ids, nParents, lineageParent = familyIndex["ids"], familyIndex["nParents"], familyIndex["lineageParent"]
+        e = lineageParent[familyIndex["position"][individual]]
+        visited = {familyIndex["position"][individual]}
+        while e != -1 and nParents[e] == 1 and e not in visited:
+            redundancies.append(ids[e].item())
+            visited.add(e)
+            e = lineageParent[e]
+        if e != -1 and nParents[e] == 0:
+            redundancies.append(ids[e].item())
+        redundancies.reverse()
+        return(redundancies)
+    ascOne = lessRelatedDatabase[family]["asc_one"]
+    visited = {individual}
+    e = individual
+    while True:
+        father, mother = ascOne[e]
+        direct_asc = father if father != 0 else mother
+        if direct_asc in ascOne and direct_asc not in visited:
+            redundancies.append(direct_asc)
+            visited.add(direct_asc)
+            e = direct_asc
+        else:
+            if direct_asc not in ascOne and direct_asc in lessRelatedDatabase[family]["asc_none"]:
+                redundancies.append(direct_asc)
+            break
+    redundancies.reverse()
+    return(redundancies)
+
+def select_participants(lessRelatedDatabase, pedigreeIndex = None, maxKinship = None, seed = None,
+                        tieBreak = "random", preferredAff = 2):
+    """
+    Outputs the largest group of unrelated individuals possible based on the data provided by the PED file. Only one
+    individual is selected from each monoparental lineage, following the tie-break strategy, the remaining asc_none
+    individuals are all selected. When maxKinship is given, every individual is a candidate and the selection is done
+    on the kinship coefficients with the select_participants_mis function.
+
+    Args:
+      minimum:
+          lessRelatedDatabase: The output of the less_related function.
+      optional:
+          pedigreeIndex: The output of the build_pedigree_index function, used to follow the lineages. It is required
+          with maxKinship and with the aff and missing tie-breaks.
+          maxKinship: largest kinship coefficient allowed between two selected individuals.
+          seed: seed of the random choices, see the family_rng function. The selection is random when it is None.
+          tieBreak, preferredAff: as in the select_family function.
+    Returns:
+      Returns a dictionary which contains as keys, the family ID. Each of this entries contains a list of unrelated
+      individuals.
+    """
+    if maxKinship is not None:
+        if pedigreeIndex is None:
+            raise ValueError("A pedigree index is required to select on kinship coefficients.")
+        return(select_participants_mis(pedigreeIndex, maxKinship = maxKinship)[0])
+
+    proposed_participants_ls = {}
+    for family in lessRelatedDatabase:
+        familyIndex = None
+        if pedigreeIndex is not None:
+            familyIndex = family_index(pedigreeIndex, family)
+        proposed_participants_ls[family] = select_family(lessRelatedDatabase, family, familyIndex, tieBreak,
+                                                         family_rng(seed, family), preferredAff)
+    return(proposed_participants_ls)
+
+def family_rng(seed, family):
+    """
+    Random generator of the selection of one family. It is seeded from both the seed and the family ID, so the
+    selection of a family does not depend on the other families, on the number of workers or on the order in which
+    families are processed.
+    Args:
+      minimum:
+          seed: an integer, or None for a generator seeded from the operating system.
+          family: a valid family ID.
+    Returns:
+        A random.Random instance.
+    """
+    if seed is None:
+        return(Random())
+    return(Random(str(seed) + "/" + str(family)))
+
+def select_family(lessRelatedDatabase, family, familyIndex = None, tieBreak = "random", rng = None, preferredAff = 2):
+    """
+    Selects the unrelated individuals of one family as described in the select_participants function. The tie-break
+    strategy scores the members of each monoparental lineage, and one of the best scored members is chosen at random.
+    Scores are read in constant time, so each lineage is resolved in time linear in its size.
+    Args:
+      minimum:
+          lessRelatedDatabase: The output of the less_related function.
+          family: a valid family ID.
+      optional:
+          familyIndex: The output of the family_index function for the family, used to follow the lineages. It is
+          required with the aff and missing tie-breaks, the missing tie-break also requires the missingness_index
+          function.
+          tieBreak: random (every member), generation (the deepest members), aff (the members whose aff status is
+          preferredAff) or missing (the members with the lowest value of the missingness column).
+          rng: the random generator, from the family_rng function. An unseeded generator is used when it is None.
+          preferredAff: aff status preferred by the aff tie-break.
+    Returns:
+      A list of unrelated individuals.
+    """
+    if rng is None:
+        rng = Random()
+    scores = None
+    if tieBreak in ["aff", "missing"]:
+        if familyIndex is None or tieBreak not in familyIndex:
+            raise ValueError("The " + tieBreak + " tie-break requires a pedigree index with the " + tieBreak + " column.")
+        if tieBreak == "aff":
+            scores = (familyIndex["aff"] == preferredAff).tolist()
+        else:
+            scores = (-familyIndex["missing"]).tolist()
+        position = familyIndex["position"]
+    elif tieBreak not in ["random", "generation"]:
+        raise ValueError("Unknown tie-break strategy: " + str(tieBreak))
+    lineages, depth = lineage_groups(lessRelatedDatabase, family, familyIndex, depths = True)
+    participants = []
+    redundant_ids = set()
+    for monoparental_lineage in lineages:
+        redundant_ids.update(monoparental_lineage)
+        if tieBreak == "generation":
+            score = [depth[e] for e in monoparental_lineage]
+        elif scores is not None:
+            score = [scores[position[e]] for e in monoparental_lineage]
+        else:
+            score = None
+        if score is not None:
+            best = max(score)
+            monoparental_lineage = [e for e, k in zip(monoparental_lineage, score) if k == best]
+        #Selecting randomly one of the best individuals per redundant lineage
+        if len(monoparental_lineage) == 1:
+            participants.append(monoparental_lineage[0])
+        else:
+            participants.append(monoparental_lineage[rng.randrange(len(monoparental_lineage))])
+    for asc_none_id in lessRelatedDatabase[family]["asc_none"]:
+        if asc_none_id not in redundant_ids:
+            participants.append(asc_none_id)
+    return(participants)
+
+def iter_bits(mask):
+    """
+    Iterates over the positions of the set bits of an integer used as a bitset, from the lowest one.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def topological_order(familyIndex, deadline = None):
+    """
+    Orders the individuals of a family so that parents come before their children (Kahn's algorithm over the CSR child
+    lists), visiting every individual and link once.
+    Args:
+      minimum:
+          familyIndex: The output of the family_index function.
+      optional:
+          deadline: time.perf_counter value after which the ordering stops.
+    Returns:
+        order: the integer codes of the family in topological order. Individuals inside or below a parent cycle, which
+        only malformed PED files contain, are appended at the end.
+        cyclic: a list of booleans, True for the individuals appended because of a parent cycle.
+        Both are None when the deadline is reached.
+    """
+    father = familyIndex["father"].tolist()
+    mother = familyIndex["mother"].tolist()
+    childPtr = familyIndex["childPtr"].tolist()
+    children = familyIndex["children"].tolist()
+    pending = [(e != -1) + (m != -1 and m != e) for e, m in zip(father, mother)]
+    order = [i for i in range(0, len(father)) if pending[i] == 0]
+    for visited, i in enumerate(order):
+        if deadline is not None and visited % 1024 == 0 and time.perf_counter() > deadline:
+            return(None, None)
+        for e in children[childPtr[i]:childPtr[i + 1]]:
+            pending[e] -= 1
+            if pending[e] == 0:
+                order.append(e)
+    cyclic = [e > 0 for e in pending]
+    if len(order) < len(father):
+        order.extend([i for i in range(0, len(father)) if cyclic[i]])
+    return(order, cyclic)
+
+def ancestry_roots(familyIndex, deadline = None):
+    """
+    Finds, for every individual of a family, its top ascendants: the registered ancestors, itself included, that have no
+    registered ascendants. Individuals are visited in topological order, parents before children, so every individual
+    is processed once. Individuals inside a parent cycle are taken as their own top ascendant. The bitsets have one bit
+    per top ascendant, so time and memory grow with the number of individuals times the number of founders.
+    Args:
+      minimum:
+          familyIndex: The output of the family_index function.
+      optional:
+          deadline: time.perf_counter value after which the search stops.
+    Returns:
+        A list with, for every integer code of the family, a bitset (a Python integer) of its top ascendants. Two
+        individuals share ancestry if and only if their bitsets intersect. None when the deadline is reached.
+    """
+    father = familyIndex["father"].tolist()
+    mother = familyIndex["mother"].tolist()
+    childPtr = familyIndex["childPtr"].tolist()
+    children = familyIndex["children"].tolist()
+    order, cyclic = topological_order(familyIndex, deadline)
+    if order is None:
+        return(None)
+    roots = [0] * len(father)
+    nRoots = 0
+    for visited, i in enumerate(order):
+        if deadline is not None and visited % 256 == 0 and time.perf_counter() > deadline:
+            return(None)
+        if cyclic[i] or (father[i] == -1 and mother[i] == -1):
+            roots[i] |= 1 << nRoots
+            nRoots += 1
+        for e in children[childPtr[i]:childPtr[i + 1]]:
+            roots[e] |= roots[i]
+    return(roots)
+
+def relatedness_graph(roots):
+    """
+    Builds the relatedness graph of a family: two individuals are related when they share a top ascendant. Individuals
+    sharing a top ascendant form a clique, so each adjacency is the union of the cliques of its top ascendants.
+    Args:
+      minimum:
+          roots: The output of the ancestry_roots function.
+    Returns:
+        A list with, for every integer code of the family, a bitset of the related individuals.
+    """
+    members = {}
+    for i, rootMask in enumerate(roots):
+        for r in iter_bits(rootMask):
+            members[r] = members.get(r, 0) | (1 << i)
+    adjacency = []
+    for i, rootMask in enumerate(roots):
+        related = 0
+        for r in iter_bits(rootMask):
+            related |= members[r]
+        adjacency.append(related & ~(1 << i))
+    return(adjacency)
+
+def clique_cover_bound(adjacency, candidates):
+    """
+    Upper bound of the independent set size among the candidates, computed as the number of cliques of a greedy clique
+    cover. Only one individual of each clique may be included in an independent set.
+    """
+    cliques = 0
+    while candidates:
+        v = (candidates & -candidates).bit_length() - 1
+        candidates ^= 1 << v
+        common = candidates & adjacency[v]
+        while common:
+            u = (common & -common).bit_length() - 1
+            candidates ^= 1 << u
+            common &= adjacency[u]
+        cliques += 1
+    return(cliques)
+
+def mis_exact(adjacency, deadline, best = 0):
+    """
+    Maximum independent set by branch and bound over bitsets. Individuals with at most one related candidate are
+    always included, the branching individual is the one with most related candidates, and branches are pruned with
+    the clique_cover_bound function.
+    Args:
+      minimum:
+          adjacency: The output of the relatedness_graph function.
+          deadline: time.perf_counter value after which the search stops.
+      optional:
+          best: bitset of an already known independent set, used as the initial incumbent.
+    Returns:
+        The bitset of the best independent set found and True if the search finished, so the set is maximum.
+    """
+    incumbent = [best, bin(best).count("1")]
+    finished = [True]
+
+    def expand(candidates, chosen, size):
+        if time.perf_counter() > deadline:
+            finished[0] = False
+            return
+        reduced = True
+        while reduced:
+            reduced = False
+            for v in iter_bits(candidates):
+                if bin(adjacency[v] & candidates).count("1") <= 1:
+                    chosen |= 1 << v
+                    size += 1
+                    candidates &= ~(adjacency[v] | (1 << v))
+                    reduced = True
+                    break
+        if candidates == 0:
+            if size > incumbent[1]:
+                incumbent[0], incumbent[1] = chosen, size
+            return
+        if size + clique_cover_bound(adjacency, candidates) <= incumbent[1]:
+            return
+        v = max(iter_bits(candidates), key = lambda e: bin(adjacency[e] & candidates).count("1"))
+        expand(candidates & ~(adjacency[v] | (1 << v)), chosen | (1 << v), size + 1)
+        expand(candidates & ~(1 << v), chosen, size)
+
+    expand((1 << len(adjacency)) - 1, 0, 0)
+    return(incumbent[0], finished[0])
+
+def founder_bits(familyIndex):
+    """
+    Bitset of the individuals of a family without registered parents, which share no ancestry with each other.
+    """
+    founders = (familyIndex["father"] == -1) & (familyIndex["mother"] == -1)
+    return(int.from_bytes(np.packbits(founders, bitorder = "little").tobytes(), "little"))
+
+def mis_greedy(roots, deadline):
+    """
+    Bounded time independent set heuristic for large families. Individuals are visited from the fewest to the most top
+    ascendants and included when they share no top ascendant with the individuals already included. When the deadline
+    is reached the remaining top ascendants, which are unrelated to each other, are included.
+    Args:
+      minimum:
+          roots: The output of the ancestry_roots function.
+          deadline: time.perf_counter value after which the search stops.
+    Returns:
+        The bitset of the independent set found.
+    """
+    counts = []
+    for i, rootMask in enumerate(roots):
+        if i % 1024 == 0 and time.perf_counter() > deadline:
+            break
+        counts.append(bin(rootMask).count("1"))
+    if len(counts) == len(roots):
+        order = sorted(range(0, len(roots)), key = counts.__getitem__)
+    else:
+        order = list(range(0, len(roots)))
+    chosen = 0
+    used = 0
+    for visited, i in enumerate(order):
+        if visited % 1024 == 0 and time.perf_counter() > deadline:
+            for e in order[visited:]:
+                if roots[e] & used == 0 and roots[e] & (roots[e] - 1) == 0:
+                    chosen |= 1 << e
+                    used |= roots[e]
+            break
+        if roots[i] & used == 0:
+            chosen |= 1 << i
+            used |= roots[i]
+    return(chosen)
+
+def kinship_index(familyIndex, deadline = None):
+    """
+    Prepares the sparse kinship computation of a family following the Meuwissen and Luo method. Individuals are
+    processed in topological order and, for each one, the sparse row of the L matrix (the contribution of every
+    ancestor, see the ancestor_row function) gives its inbreeding coefficient F and the Mendelian sampling variance D of
+    the A = L D L' decomposition of the numerator relationship matrix. The row of an individual is built from the rows
+    of its parents, and it is freed as soon as all its children are built, so only the rows of the individuals with
+    children still to build are held at once. Individuals in a parent cycle are taken as founders.
+    Args:
+      minimum:
+          familyIndex: The output of the family_index function.
+      optional:
+          deadline: time.perf_counter value after which the remaining individuals are not processed.
+    Returns:
+        A dictionary with the registered parents, the number of children, the topological order and rank, D and F of
+        every integer code of the family, and built, the number of individuals of the order that were processed before
+        the deadline.
+    """
+    order, cyclic = topological_order(familyIndex)
+    father = familyIndex["father"].tolist()
+    mother = familyIndex["mother"].tolist()
+    parents = []
+    nChildren = [0] * len(father)
+    for i in range(0, len(father)):
+        parents.append([] if cyclic[i] else [e for e in [father[i], mother[i]] if e != -1])
+        for p in parents[i]:
+            nChildren[p] += 1
+    rank = [0] * len(father)
+    for r, i in enumerate(order):
+        rank[i] = r
+    kinshipIndex = {"parents": parents, "nChildren": nChildren, "order": order, "rank": rank,
+                    "D": [1.0] * len(father), "F": [0.0] * len(father), "built": len(order)}
+    D, F = kinshipIndex["D"], kinshipIndex["F"]
+    rows = {}
+    pending = list(nChildren)
+    for visited, i in enumerate(order):
+        if deadline is not None and visited % 32 == 0 and time.perf_counter() > deadline:
+            kinshipIndex["built"] = visited
+            break
+        if len(parents[i]) == 2:
+            D[i] = 0.5 - 0.25 * (F[parents[i][0]] + F[parents[i][1]])
+        elif len(parents[i]) == 1:
+            D[i] = 0.75 - 0.25 * F[parents[i][0]]
+        row = ancestor_row(kinshipIndex, rows, i)
+        if len(parents[i]) == 2:
+            F[i] = sum(l * l * D[k] for k, l in row.items()) - 1
+        release_parent_rows(kinshipIndex, rows, pending, i, row)
+    return(kinshipIndex)
+
+def ancestor_row(kinshipIndex, rows, i):
+    """
+    Sparse row of the L matrix of an individual: the contribution of the individual and of each of its ancestors. Each
+    parent passes half of its own row, so the rows of the parents must be in rows.
+    Args:
+      minimum:
+          kinshipIndex: The output of the kinship_index function.
+          rows: a dictionary from integer code to the row of the individuals built so far.
+          i: an integer code of the family.
+    Returns:
+        A dictionary from integer code to contribution, the individual itself has a contribution of 1.
+    """
+    row = {i: 1.0}
+    for p in kinshipIndex["parents"][i]:
+        for k, l in rows[p].items():
+            row[k] = row.get(k, 0.0) + 0.5 * l
+    return(row)
+
+def release_parent_rows(kinshipIndex, rows, pending, i, row):
+    """
+    Keeps the row of a newly built individual while it has children to build, and frees the rows of its parents once
+    their last child is built.
+    """
+    for p in kinshipIndex["parents"][i]:
+        pending[p] -= 1
+        if pending[p] == 0:
+            del rows[p]
+    if pending[i] > 0:
+        rows[i] = row
+
+def kinship_graph(kinshipIndex, maxKinship):
+    """
+    Builds the relatedness graph of a small family from the pairwise kinship coefficients: two individuals are related
+    when their kinship is above maxKinship. The kinship of i and j is half of the sum, over their common ancestors k,
+    of L[i][k] * L[j][k] * D[k]. Every row is held at once, so it is only used for the families of the exact engine.
+    Args:
+      minimum:
+          kinshipIndex: The output of the kinship_index function, with every individual built.
+          maxKinship: largest kinship coefficient allowed between two selected individuals.
+    Returns:
+        A list with, for every integer code of the family, a bitset of the related individuals.
+    """
+    D = kinshipIndex["D"]
+    rows = {}
+    byAncestor = {}
+    for i in kinshipIndex["order"]:
+        rows[i] = ancestor_row(kinshipIndex, rows, i)
+        for k, l in rows[i].items():
+            byAncestor.setdefault(k, []).append([i, l])
+    relationship = {}
+    for k in byAncestor:
+        for a in range(0, len(byAncestor[k])):
+            i, li = byAncestor[k][a]
+            for j, lj in byAncestor[k][a + 1:]:
+                key = (i, j) if i < j else (j, i)
+                relationship[key] = relationship.get(key, 0.0) + li * lj * D[k]
+    adjacency = [0] * len(D)
+    for (i, j), a in relationship.items():
+        if a / 2 > maxKinship:
+            adjacency[i] |= 1 << j
+            adjacency[j] |= 1 << i
+    return(adjacency)
+
+def kinship_greedy(kinshipIndex, maxKinship, deadline):
+    """
+    Bounded time selection under a kinship threshold for large families. Individuals are visited in topological order,
+    founders first, and included when their kinship with every individual already included is at most maxKinship. The
+    L rows are built again as in the kinship_index function and freed once all the children of an individual are
+    built, and the rows of the included individuals are indexed by ancestor, so only the included individuals sharing
+    an ancestor with the candidate are compared. When the deadline is reached, or at the first individual that the
+    kinship_index function did not build, the remaining founders, which are unrelated to each other, are included when
+    their kinship with the individuals already included is at most maxKinship, so the selection is never empty.
+    Args:
+      minimum:
+          kinshipIndex: The output of the kinship_index function.
+          maxKinship: largest kinship coefficient allowed between two selected individuals.
+          deadline: time.perf_counter value after which the search stops.
+    Returns:
+        The bitset of the selected individuals.
+    """
+    D, parents, order = kinshipIndex["D"], kinshipIndex["parents"], kinshipIndex["order"]
+    chosen = 0
+    selectedByAncestor = {}
+    rows = {}
+    pending = list(kinshipIndex["nChildren"])
+    for visited, i in enumerate(order):
+        if visited >= kinshipIndex["built"] or (visited % 32 == 0 and time.perf_counter() > deadline):
+            for e in order[visited:]:
+                if not parents[e] and all(l * D[e] / 2 <= maxKinship for j, l in selectedByAncestor.get(e, [])):
+                    chosen |= 1 << e
+            break
+        row = ancestor_row(kinshipIndex, rows, i)
+        relationship = {}
+        for k, l in row.items():
+            for j, lj in selectedByAncestor.get(k, []):
+                relationship[j] = relationship.get(j, 0.0) + l * lj * D[k]
+        if all(a / 2 <= maxKinship for a in relationship.values()):
+            chosen |= 1 << i
+            for k, l in row.items():
+                selectedByAncestor.setdefault(k, []).append([i, l])
+        release_parent_rows(kinshipIndex, rows, pending, i, row)
+    return(chosen)
+
+def select_participants_mis(pedigreeIndex, exactLimit = 64, timeLimit = 1.0, maxKinship = None):
+    """
+    Alternative selection engine that models relatedness as a graph and solves a maximum independent set in every
+    family. Individuals are related when they share a registered ancestor, or, when maxKinship is given, when their
+    kinship coefficient is above maxKinship. Every individual of the PED file is a candidate, not only the asc_none and
+    asc_one groups. Families up to exactLimit individuals are solved with the mis_exact branch and bound, larger
+    families with the mis_greedy or the kinship_greedy heuristic.
+    Args:
+      minimum:
+          pedigreeIndex: The output of the build_pedigree_index function.
+      optional:
+          exactLimit: largest family size solved with the exact engine.
+          timeLimit: seconds allowed to solve each family. The best set found so far is kept when it is exceeded.
+          maxKinship: largest kinship coefficient allowed between two selected individuals.
+    Returns:
+        proposed_participants: a dictionary which contains as keys, the family ID. Each of this entries contains a list
+        of unrelated individuals.
+        selectionReport: a dictionary which contains as keys, the family ID. Each entry reports the individuals of the
+        family, the engine used, the set size, whether the set is known to be maximum and the solve time in seconds.
+    """
+    proposed_participants = {}
+    selectionReport = {}
+    for family in pedigreeIndex["families"]:
+        proposed_participants[family], selectionReport[family] = select_family_mis(family_index(pedigreeIndex, family),
+                                                                                    exactLimit, timeLimit, maxKinship)
+    return(proposed_participants, selectionReport)
+
+def select_family_mis(familyIndex, exactLimit = 64, timeLimit = 1.0, maxKinship = None):
+    """
+    Solves the maximum independent set of one family as described in the select_participants_mis function.
+    Args:
+      minimum:
+          familyIndex: The output of the family_index function.
+      optional:
+          exactLimit: largest family size solved with the exact engine.
+          timeLimit: seconds allowed to solve the family.
+          maxKinship: largest kinship coefficient allowed between two selected individuals.
+    Returns:
+        A list of unrelated individuals and the selection report entry of the family.
+    """
+    start = time.perf_counter()
+    deadline = start + timeLimit
+    if maxKinship is None:
+        roots = ancestry_roots(familyIndex, deadline)
+        complete = roots is not None
+        if complete:
+            chosen = mis_greedy(roots, deadline)
+        else:
+            chosen = founder_bits(familyIndex)
+    else:
+        #the index gets half of the time, and the greedy pass the rest
+        kinshipIndex = kinship_index(familyIndex, start + timeLimit / 2)
+        chosen = kinship_greedy(kinshipIndex, maxKinship, deadline)
+        complete = kinshipIndex["built"] == len(familyIndex["ids"])
+    if len(familyIndex["ids"]) <= exactLimit and complete:
+        engine = "exact"
+        if maxKinship is None:
+            adjacency = relatedness_graph(roots)
+        else:
+            adjacency = kinship_graph(kinshipIndex, maxKinship)
+        chosen, optimal = mis_exact(adjacency, deadline, chosen)
+    else:
+        engine = "heuristic"
+        optimal = False
+    ids = familyIndex["ids"].tolist()
+    participants = [ids[e] for e in sorted(iter_bits(chosen))]
+    report = {"individuals": len(ids), "engine": engine, "size": len(participants), "optimal": optimal,
+              "seconds": time.perf_counter() - start}
+    return(participants, report)
+
+def balanced_batches(pedigreeIndex, families, workers):
+    """
+    Splits the families in batches for a process pool. Families are sorted from the largest to the smallest, so the
+    largest families start first and do not stall the end of the run, and small families are packed together until the
+    batch reaches a share of the total number of individuals, which keeps the pool overhead low.
+    Args:
+      minimum:
+          pedigreeIndex: The output of the build_pedigree_index function.
+          families: the family IDs to split.
+          workers: number of worker processes.
+    Returns:
+        A list of batches, each batch is a list of family IDs. Batches are sorted from the largest to the smallest.
+    """
+    if "familyPosition" not in pedigreeIndex:
+        pedigreeIndex["familyPosition"] = {e: i for i, e in enumerate(pedigreeIndex["families"])}
+    sizes = np.diff(pedigreeIndex["offsets"])
+    familySizes = [sizes[pedigreeIndex["familyPosition"][family]].item() for family in families]
+    target = max(1, sum(familySizes) // (max(workers, 1) * 8))
+    batches = []
+    batch = []
+    batchSize = 0
+    for k in sorted(range(0, len(families)), key = lambda e: -familySizes[e]):
+        batch.append(families[k])
+        batchSize += familySizes[k]
+        if batchSize >= target:
+            batches.append(batch)
+            batch = []
+            batchSize = 0
+    if len(batch) > 0:
+        batches.append(batch)
+    return(batches)
+
+def run_family_batches(task, batches, workers):
+    """
+    Runs a task over every batch of families, in a process pool when more than one worker is requested.
+    Args:
+      minimum:
+          task: a picklable function that takes one batch.
+          batches: the batches to process, as built from the balanced_batches function.
+          workers: number of worker processes, the batches are processed in this process when it is 1 or less.
+    Returns:
+        A list with the output of the task for every batch, in the order of the batches.
+    """
+    if workers <= 1 or len(batches) <= 1:
+        return([task(batch) for batch in batches])
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers = workers) as pool:
+        return(list(pool.map(task, batches)))
+
+def select_family_batch(batch, engine = "lineage", exactLimit = 64, timeLimit = 1.0, maxKinship = None,
+                        profile = False, seed = None, tieBreak = "random", preferredAff = 2, cacheDir = None):
+    """
+    Process pool task of the select_participants_parallel function.
+    Args:
+      minimum:
+          batch: a list of [family ID, family index, less_related entry of the family] items. The family index is
+          replaced by the output of the family_offsets function when cacheDir is given.
+      optional:
+          engine, exactLimit, timeLimit, maxKinship, seed, tieBreak, preferredAff, cacheDir: as in the
+          select_participants_parallel function.
+          profile: measure the selection of every family with the profile_stage function.
+    Returns:
+        A list of [family ID, selected individuals, selection report entry, profile record] items, the report entry is
+        None for the lineage engine and the profile record is None unless profile is set.
+    """
+    cachedIndex = load_cache_index(cacheDir) if cacheDir is not None else None
+    results = []
+    for family, familyIndex, lessRelatedEntry in batch:
+        if cachedIndex is not None:
+            familyIndex = family_index(cachedIndex, family, familyIndex)
+        familyProfiler = new_profiler() if profile else None
+        with profile_stage(familyProfiler, "select_family", family):
+            if engine == "mis":
+                participants, report = select_family_mis(familyIndex, exactLimit, timeLimit, maxKinship)
+            else:
+                participants = select_family({family: lessRelatedEntry}, family, familyIndex, tieBreak,
+                                             family_rng(seed, family), preferredAff)
+                report = None
+        record = familyProfiler["families"][0] if profile else None
+        results.append([family, participants, report, record])
+    return(results)
+
+def select_participants_parallel(lessRelatedDatabase, pedigreeIndex, engine = "lineage", workers = 1, exactLimit = 64,
+                                 timeLimit = 1.0, families = None, maxKinship = None, profiler = None, seed = None,
+                                 tieBreak = "random", preferredAff = 2, cacheDir = None):
+    """
+    Runs the selection of every family across a process pool. Families are independent, so they are sharded with the
+    balanced_batches function and the results are merged back in the order of the single process engines, which keeps
+    the output deterministic whatever the number of workers.
+    Args:
+      minimum:
+          lessRelatedDatabase: The output of the less_related function, it may be None for the mis engine.
+          pedigreeIndex: The output of the build_pedigree_index function.
+      optional:
+          engine: lineage (select_participants) or mis (select_participants_mis).
+          workers: number of worker processes.
+          exactLimit, timeLimit: as in the select_participants_mis function.
+          families: only select these families.
+          maxKinship: as in the select_participants_mis function, it implies the mis engine.
+          profiler: the output of the new_profiler function, the selection of every family is added to it.
+          seed, tieBreak, preferredAff: as in the select_participants function, for the lineage engine.
+          cacheDir: Directory of the cache pedigreeIndex was loaded from, with the load_pedigree_cache function. The
+          workers then memory-map the index and only receive the offsets of their families.
+    Returns:
+        proposed_participants: a dictionary which contains as keys, the family ID. Each of this entries contains a list
+        of unrelated individuals.
+        selectionReport: as in the select_participants_mis function, empty for the lineage engine.
+    """
+    if maxKinship is not None:
+        engine = "mis"
+    requested = families
+    if engine == "mis":
+        families = pedigreeIndex["families"]
+    else:
+        families = list(lessRelatedDatabase)
+    if requested is not None:
+        requested = set(requested)
+        families = [family for family in families if family in requested]
+    items = {}
+    for family in families:
+        lessRelatedEntry = lessRelatedDatabase[family] if engine != "mis" else None
+        if cacheDir is not None:
+            items[family] = [family, family_offsets(pedigreeIndex, family), lessRelatedEntry]
+        else:
+            items[family] = [family, family_index(pedigreeIndex, family), lessRelatedEntry]
+    batches = [[items[family] for family in batch] for batch in balanced_batches(pedigreeIndex, families, workers)]
+    task = partial(select_family_batch, engine = engine, exactLimit = exactLimit, timeLimit = timeLimit,
+                   maxKinship = maxKinship, profile = profiler is not None, seed = seed, tieBreak = tieBreak,
+                   preferredAff = preferredAff, cacheDir = cacheDir)
+    results = {}
+    for batchResults in run_family_batches(task, batches, workers):
+        for family, participants, report, record in batchResults:
+            results[family] = [participants, report]
+            if record is not None:
+                add_profile_record(profiler, record)
+    proposed_participants = {}
+    selectionReport = {}
+    for family in families:
+        proposed_participants[family] = results[family][0]
+        if results[family][1] is not None:
+            selectionReport[family] = results[family][1]
+    return(proposed_participants, selectionReport)
+
+def write_selection_report(selectionReport, save_dir):
+    """
+    Exports the selection report of the select_participants_mis function as selection_report.tsv, one row per family.
+    Args:
+      minimum:
+          selectionReport: The report output of the select_participants_mis function.
+          save_dir: Directory where to save results
+    """
+    report = pd.DataFrame.from_dict(selectionReport, orient = "index")
+    report.index.name = "famid"
+    os.makedirs(save_dir, exist_ok = True)
+    report.to_csv(save_dir + 'selection_report.tsv', sep = '\t')
+
+def selection_keys(proposed_participants):
+    """
+    Turns the output of a selection engine into a (famid, id) keyed index, so that membership of every PED row can be
+    tested at once.
+    Args:
+      minimum:
+          proposed_participants: A dictionary which contains as keys, the family ID. Each of this entries contains a
+          list of unrelated individuals.
+    Returns:
+        A pandas MultiIndex with one (famid, id) entry per selected individual.
+    """
+    families = []
+    ids = []
+    for family in proposed_participants:
+        families.extend([family] * len(proposed_participants[family]))
+        ids.extend(proposed_participants[family])
+    return(pd.MultiIndex.from_arrays([families, ids], names = ["famid", "id"]))
+
+def selection_output_path(save_dir, outputFormat = "ped"):
+    """
+    Path of the annotated PED file for an output format: ped (tab separated), ped.gz (gzip compressed tab separated) or
+    parquet.
+    """
+    return(save_dir + 'pedigree_selection.' + outputFormat)
+
+def selection_status(PED, proposed_participants):
+    """
+    Finds the selection status of every row of a PED file with a single lookup of its (famid, id) key in the
+    selection_keys index.
+    Args:
+      minimum:
+          PED: A PED file with the 'famid' and 'id' columns.
+          proposed_participants: The output of the select_participants function.
+    Returns:
+        An int8 array with 2 for the selected individuals and 0 for the others, in the order of the rows.
+    """
+    rowKeys = pd.MultiIndex.from_arrays([PED["famid"].to_numpy(), PED["id"].to_numpy()])
+    return(np.where(rowKeys.isin(selection_keys(proposed_participants)), 2, 0).astype(np.int8))
+
+def ped_annotate_selected(PED, proposed_participants, save_dir, append = False, outputFormat = "ped"):
+    """
+    The PED file is annotated with the selection status for each individual. A value of 2 indicates that the individual was
+    included in the unrelated selected individual group, a value of 0 indicates otherwise, as found by the
+    selection_status function.
+    Args:
+      minimum:
+          PED: A PED file is required. The column name of the data corresponding to the family ID must be
+          'famid', likewise the individual ID must be 'id', father ID must be set as 'fid', mother ID as 'mid' and sex
+          as 'sex'.
+          proposed_participants: The output of the select_participants function. A dictionary which contains as keys, the
+          family ID. Each of this entries contains a list of unrelated individuals.
+          save_dir: Directory where to save results
+      optional:
+          append: append the rows, without header, to an existing annotated file. Not available for parquet.
+          outputFormat: ped (tab separated), ped.gz (gzip compressed tab separated) or parquet (requires pyarrow or
+          fastparquet).
+    Returns:
+      The PED file with an added column named "selection_status" which indicates if individuals where selected
+      using the value 2. If the individuals were not selected, the selection_status was set to 0. The PED file is exported
+      as pedigree_selection.ped (or .ped.gz, .parquet) to the working directory.
+    """
+    PED["selection_status"] = selection_status(PED, proposed_participants)
+    os.makedirs(save_dir, exist_ok = True)
+    outputPath = selection_output_path(save_dir, outputFormat)
+    if outputFormat == "parquet":
+        if append:
+            raise ValueError("The parquet output can not be appended to.")
+        PED.to_parquet(outputPath, index = False)
+    elif append:
+        PED.to_csv(outputPath, sep = '\t', index = False, header = False, mode = 'a')
+    else:
+        PED.to_csv(outputPath, sep = '\t', index = False)
+    return PED
+
+def family_hashes(PED, pedigreeIndex):
+    """
+    Content hash of the rows of every family, used to find the families that changed since the last run. Integer
+    columns are hashed as 64 bit integers, so that the hash does not depend on the dtypes chosen when reading the file.
+    Args:
+      minimum:
+          PED: A PED file.
+          pedigreeIndex: The output of the build_pedigree_index function, built from the same PED file.
+    Returns:
+        A dictionary with the hexadecimal hash of every family, in order of appearance.
+    """
+    columns = [column for column in PED.columns if column != "selection_status"]
+    hashedPED = PED[columns].astype({column: np.int64 for column in columns if pd.api.types.is_integer_dtype(PED[column])})
+    rowHashes = pd.util.hash_pandas_object(hashedPED, index = False).to_numpy()[pedigreeIndex["rows"]]
+    offsets = pedigreeIndex["offsets"].tolist()
+    hashes = {}
+    for k, family in enumerate(pedigreeIndex["families"]):
+        hashes[family] = hashlib.blake2b(rowHashes[offsets[k]:offsets[k + 1]].tobytes(), digest_size = 16).hexdigest()
+    return(hashes)
+
+def load_selection_cache(save_dir, settings, graphSettings = None):
+    """
+    Loads the selection cache of a previous incremental run from selection_cache.json. The cache is discarded when it
+    was written with different selection settings, and the graphs of the previous run are only reused when they were
+    written with the same graph settings.
+    Args:
+      minimum:
+          save_dir: Directory where results are saved
+          settings: a dictionary with the selection settings of this run.
+      optional:
+          graphSettings: a dictionary with the settings of this run that change the graphs, None when no graph is
+          written.
+    Returns:
+        A dictionary with the settings, the previous entries of every family (hash, selected individuals and selection
+        report entry), an empty dictionary for the entries of this run and whether the previous graphs can be reused.
+    """
+    previous = {}
+    graphsReusable = False
+    cachePath = save_dir + 'selection_cache.json'
+    if os.path.exists(cachePath):
+        with open(cachePath) as cacheFile:
+            stored = json.load(cacheFile)
+        if stored.get("settings") == settings:
+            for family, familyHash, participants, report in stored["families"]:
+                previous[family] = {"hash": familyHash, "participants": participants, "report": report}
+            graphsReusable = graphSettings is not None and stored.get("graphSettings") == graphSettings
+    return({"settings": settings, "graphSettings": graphSettings, "previous": previous, "families": {},
+            "graphsReusable": graphsReusable})
+
+def save_selection_cache(selectionCache, save_dir):
+    """
+    Saves the entries of the families processed in this run to selection_cache.json. Families that are no longer in the
+    PED file are dropped.
+    Args:
+      minimum:
+          selectionCache: The output of the load_selection_cache function, filled by the process_ped function.
+          save_dir: Directory where to save results
+    """
+    families = []
+    for family, entry in selectionCache["families"].items():
+        families.append([family, entry["hash"], entry["participants"], entry["report"]])
+    os.makedirs(save_dir, exist_ok = True)
+    with open(save_dir + 'selection_cache.json', 'w') as cacheFile:
+        json.dump({"settings": selectionCache["settings"], "graphSettings": selectionCache.get("graphSettings"),
+                   "families": families}, cacheFile)
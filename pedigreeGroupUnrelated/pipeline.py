@@ -0,0 +1,277 @@
+import numpy as np
+import pandas as pd
+import itertools
+import os
+import tracemalloc
+
+from .pedigree import (build_pedigree_index, cached_pedigree, family_hashes, less_related, load_selection_cache,
+                       missingness_index, ped_annotate_selected, read_ped_families, repair_pedigree,
+                       save_selection_cache, select_participants_parallel, selection_status, validate_pedigree,
+                       write_selection_report, write_validation_report)
+from .profiling import new_profiler, profile_iterator, profile_stage, write_profile_report
+
+
+def validated_pedigree(PED, pedigreeIndex, repair = False):
+    """
+    Validates a PED file with the validate_pedigree function, or repairs it with the repair_pedigree function, before
+    any selection.
+    Args:
+      minimum:
+          PED: A PED file.
+          pedigreeIndex: The output of the build_pedigree_index function for PED.
+      optional:
+          repair: repair the PED file instead of only validating it.
+    Returns:
+        The PED file, repaired when repair is set, its pedigree index and the validation report.
+    """
+    if repair:
+        PED, validationReport = repair_pedigree(PED, pedigreeIndex)
+        if len(validationReport) > 0:
+            pedigreeIndex = build_pedigree_index(PED)
+    else:
+        validationReport = validate_pedigree(PED, pedigreeIndex)
+    return(PED, pedigreeIndex, validationReport)
+
+def process_ped(PED, save_dir, workers = 1, selectionOptions = None, outputFormat = "ped", renderOptions = None,
+                append = False, selectionCache = None, profiler = None, graphs = True, pedigreeIndex = None,
+                repair = False, sourceRows = None, cacheDir = None):
+    """
+    Validates, selects, annotates and graphs the families of a PED file. The issues found by the validate_pedigree
+    function are written to validation_report.tsv before any selection. With a selection cache only the families whose rows
+    changed since the previous run are selected again, and the selection of the other families is reused. When the
+    graph settings did not change either, only the DOT sources of the changed families are written again, and the
+    sources of the other families are only rendered when their SVG is missing or outdated.
+    Args:
+      minimum:
+          PED: A PED file.
+          save_dir: Directory where to save results
+      optional:
+          workers: number of worker processes.
+          selectionOptions: a dictionary of keyword arguments for the select_participants_parallel function, plus the
+          missingnessColumn of the missingness_index function.
+          outputFormat, append: as in the ped_annotate_selected function.
+          renderOptions: a dictionary of keyword arguments for the render_pedigrees function.
+          selectionCache: The output of the load_selection_cache function, its entries are updated.
+          profiler: The output of the new_profiler function, every stage is added to it.
+          graphs: graph the pedigree of the families, the graphs are not imported when it is not set.
+          pedigreeIndex: The output of the build_pedigree_index function for PED, built when not given.
+          repair: select on the PED file repaired with the repair_pedigree function.
+          sourceRows: row number in the PED file of every row of PED, written to the row column of the validation
+          report. The position in PED is written when not given.
+          cacheDir: Directory of the cache PED and pedigreeIndex were loaded from, with the load_pedigree_cache
+          function. The workers read their families from it, unless repair or missingnessColumn change the index.
+    Returns:
+        selectionReport: as in the select_participants_parallel function.
+    """
+    selectionOptions = dict(selectionOptions or {})
+    missingnessColumn = selectionOptions.pop("missingnessColumn", None)
+    if pedigreeIndex is None:
+        with profile_stage(profiler, "build_pedigree_index"):
+            pedigreeIndex = build_pedigree_index(PED)
+    with profile_stage(profiler, "validate_pedigree"):
+        PED, validatedIndex, validationReport = validated_pedigree(PED, pedigreeIndex, repair)
+    if missingnessColumn is not None or validatedIndex is not pedigreeIndex:
+        cacheDir = None
+    pedigreeIndex = validatedIndex
+    if missingnessColumn is not None:
+        missingness_index(PED, pedigreeIndex, missingnessColumn)
+    if sourceRows is not None:
+        validationReport["row"] = np.asarray(sourceRows)[validationReport["row"].to_numpy()]
+        validationReport = validationReport.sort_values("row", kind = "stable").reset_index(drop = True)
+    write_validation_report(validationReport, save_dir, append)
+    if len(validationReport) > 0:
+        print(str(len(validationReport)) + " pedigree issues found, see " + save_dir + "validation_report.tsv")
+    lessRelatedDatabase = None
+    if selectionOptions.get("engine", "lineage") != "mis" and selectionOptions.get("maxKinship") is None:
+        with profile_stage(profiler, "less_related"):
+            lessRelatedDatabase = less_related(PED)
+    changed = None
+    if selectionCache is not None:
+        with profile_stage(profiler, "family_hashes"):
+            hashes = family_hashes(PED, pedigreeIndex)
+        previous = selectionCache["previous"]
+        changed = [family for family in hashes if family not in previous or previous[family]["hash"] != hashes[family]]
+    with profile_stage(profiler, "select_participants"):
+        proposed_participants, selectionReport = select_participants_parallel(lessRelatedDatabase, pedigreeIndex,
+                                                                              workers = workers, families = changed,
+                                                                              profiler = profiler, cacheDir = cacheDir,
+                                                                              **selectionOptions)
+    renderFamilies = None
+    if selectionCache is not None:
+        for family in hashes:
+            if family in previous and previous[family]["hash"] == hashes[family]:
+                selectionCache["families"][family] = previous[family]
+                proposed_participants[family] = previous[family]["participants"]
+                if previous[family]["report"] is not None:
+                    selectionReport[family] = previous[family]["report"]
+            else:
+                selectionCache["families"][family] = {"hash": hashes[family],
+                                                      "participants": proposed_participants.get(family, []),
+                                                      "report": selectionReport.get(family)}
+        selectionReport = {family: selectionReport[family] for family in hashes if family in selectionReport}
+    with profile_stage(profiler, "ped_annotate_selected"):
+        annotatedPED = ped_annotate_selected(PED, proposed_participants, save_dir, append, outputFormat)
+    if not graphs:
+        return(selectionReport)
+    from .render import dot_output_path, render_pedigrees
+    if selectionCache is not None and selectionCache["graphsReusable"]:
+        missing = [family for family in hashes if not os.path.exists(dot_output_path(save_dir, family))]
+        renderFamilies = set(changed) | set(missing)
+    with profile_stage(profiler, "render_pedigrees"):
+        render_pedigrees(annotatedPED, pedigreeIndex, save_dir, workers, families = renderFamilies,
+                         profiler = profiler, cacheDir = cacheDir, **(renderOptions or {}))
+    return(selectionReport)
+
+def select_streaming(pedigreeFile, save_dir, chunksize = 1000000, workers = 1, selectionOptions = None,
+                     outputFormat = "ped", renderOptions = None, selectionCache = None, profiler = None,
+                     graphs = True, repair = False):
+    """
+    Runs the whole pipeline over a PED file read with the read_ped_families function. Families are gathered in batches
+    of about chunksize rows, and each batch is selected, annotated, appended to pedigree_selection.ped and graphed with
+    the process_ped function before the next one is read. The validation report gives the row numbers of the PED file,
+    not the positions in the batch.
+    Args:
+      minimum:
+          pedigreeFile: path to the PED file.
+          save_dir: Directory where to save results
+      optional:
+          chunksize: number of rows read at once and processed in each batch.
+          workers, selectionOptions, renderOptions, selectionCache, profiler, graphs, repair: as in the process_ped
+          function, reading
+          the file is profiled as the read_ped_families stage.
+          outputFormat: ped or ped.gz, as in the ped_annotate_selected function.
+    Returns:
+        selectionReport: as in the select_participants_parallel function.
+    """
+    selectionReport = {}
+    batch = []
+    batchSize = 0
+    appendOutput = False
+    families = profile_iterator(profiler, "read_ped_families", read_ped_families(pedigreeFile, chunksize))
+    for family, familyPED in itertools.chain(families, [(None, None)]):
+        if familyPED is not None:
+            batch.append(familyPED)
+            batchSize += len(familyPED)
+        if len(batch) == 0 or (familyPED is not None and batchSize < chunksize):
+            continue
+        sourceRows = np.concatenate([piece.index.to_numpy() for piece in batch])
+        PED = pd.concat(batch, ignore_index = True)
+        batch = []
+        batchSize = 0
+        selectionReport.update(process_ped(PED, save_dir, workers, selectionOptions, outputFormat, renderOptions,
+                                           appendOutput, selectionCache, profiler, graphs, repair = repair,
+                                           sourceRows = sourceRows))
+        appendOutput = True
+    return(selectionReport)
+
+def run_pipeline(pedigreeFile, resultsDirectory = 'results/', engine = "lineage", exactLimit = 64, timeLimit = 1.0,
+                 workers = 1, chunksize = 0, outputFormat = "ped", renderJobs = None, dotOnly = False, view = False,
+                 renderMinSize = None, renderMaxSize = None, renderStatus = None, incremental = False,
+                 maxKinship = None, profile = False, noGraphs = False, seed = None, tieBreak = "random",
+                 preferredAff = 2, cache = None, graphMaxNodes = None, graphDepth = 2, repair = False,
+                 missingnessColumn = None, profileCallbacks = None):
+    """
+    Runs the whole pipeline over a PED file: validation report, selection, annotated PED file, selection report, pedigree
+    graphs, selection cache and profile report. The arguments are those of the command line.
+    Args:
+      minimum:
+          pedigreeFile: path to the PED file.
+      optional:
+          resultsDirectory: Directory where to save results
+          engine, exactLimit, timeLimit, maxKinship: as in the select_participants_parallel function.
+          workers: number of worker processes.
+          chunksize: stream the PED file with the select_streaming function, processing batches of about this many rows.
+          outputFormat: as in the ped_annotate_selected function.
+          renderJobs, dotOnly, view: as in the render_pedigrees function.
+          renderMinSize, renderMaxSize, renderStatus: minSize, maxSize and status of the render_pedigrees function.
+          incremental: only select and graph again the families that changed since the previous run.
+          profile: write the time and peak memory of every stage and family to profile_report.json.
+          noGraphs: only select and annotate the families.
+          seed, tieBreak, preferredAff: as in the select_participants function.
+          cache: Directory of the binary pedigree cache read with the cached_pedigree function, not available with
+          chunksize.
+          graphMaxNodes, graphDepth: maxNodes and depth of the render_pedigrees function.
+          repair: as in the process_ped function.
+          missingnessColumn: as in the missingness_index function, required by the missing tie-break.
+          profileCallbacks: as the callbacks of the new_profiler function, they imply profile.
+    Returns:
+        selectionReport: as in the select_participants_parallel function.
+    """
+    if chunksize > 0 and cache is not None:
+        raise ValueError("The pedigree cache can not be combined with a chunksize.")
+    if tieBreak == "missing" and missingnessColumn is None:
+        raise ValueError("The missing tie-break requires a missingness column.")
+    selectionOptions = {"engine": engine, "exactLimit": exactLimit, "timeLimit": timeLimit, "maxKinship": maxKinship,
+                        "seed": seed, "tieBreak": tieBreak, "preferredAff": preferredAff,
+                        "missingnessColumn": missingnessColumn}
+    renderOptions = {"renderJobs": renderJobs, "dotOnly": dotOnly, "view": view, "minSize": renderMinSize,
+                     "maxSize": renderMaxSize, "status": renderStatus, "maxNodes": graphMaxNodes, "depth": graphDepth}
+    graphSettings = None
+    if not noGraphs:
+        graphSettings = {"minSize": renderMinSize, "maxSize": renderMaxSize, "status": renderStatus,
+                         "maxNodes": graphMaxNodes, "depth": graphDepth}
+    selectionCache = None
+    if incremental:
+        selectionCache = load_selection_cache(resultsDirectory, selectionOptions, graphSettings)
+    profiler = None
+    if profile or profileCallbacks is not None:
+        profiler = new_profiler(profileCallbacks)
+    with profile_stage(profiler, "total"):
+        if chunksize > 0:
+            selectionReport = select_streaming(pedigreeFile, resultsDirectory, chunksize, workers, selectionOptions,
+                                               outputFormat, renderOptions, selectionCache, profiler, not noGraphs,
+                                               repair)
+        elif cache is not None:
+            with profile_stage(profiler, "cached_pedigree"):
+                PED, pedigreeIndex = cached_pedigree(pedigreeFile, cache)
+            selectionReport = process_ped(PED, resultsDirectory, workers, selectionOptions, outputFormat, renderOptions,
+                                          selectionCache = selectionCache, profiler = profiler, graphs = not noGraphs,
+                                          pedigreeIndex = pedigreeIndex, repair = repair, cacheDir = cache)
+        else:
+            with profile_stage(profiler, "read_csv"):
+                PED = pd.read_csv(pedigreeFile, sep='\t')
+            selectionReport = process_ped(PED, resultsDirectory, workers, selectionOptions, outputFormat, renderOptions,
+                                          selectionCache = selectionCache, profiler = profiler, graphs = not noGraphs,
+                                          repair = repair)
+    if len(selectionReport) > 0:
+        write_selection_report(selectionReport, resultsDirectory)
+    if selectionCache is not None:
+        save_selection_cache(selectionCache, resultsDirectory)
+    if profiler is not None:
+        write_profile_report(profiler, resultsDirectory)
+        if profiler["startedTracing"]:
+            tracemalloc.stop()
+    return(selectionReport)
+
+def select_unrelated(PED, engine = "lineage", workers = 1, exactLimit = 64, timeLimit = 1.0, maxKinship = None,
+                     seed = None, tieBreak = "random", preferredAff = 2, missingnessColumn = None, repair = False):
+    """
+    Selects a group of unrelated individuals from a PED file in memory, without writing anything. The PED file is
+    validated, or repaired, before the selection as in the process_ped function.
+    Args:
+      minimum:
+          PED: A PED file with the 'famid', 'id', 'fid', 'mid' and 'sex' columns.
+      optional:
+          engine, workers, exactLimit, timeLimit, maxKinship, seed, tieBreak, preferredAff: as in the
+          select_participants_parallel function.
+          missingnessColumn: as in the missingness_index function, required by the missing tie-break.
+          repair: select on the PED file repaired with the repair_pedigree function.
+    Returns:
+        A copy of the PED file, repaired when repair is set, with a selection_status column, as in the
+        ped_annotate_selected function, the selection report of the select_participants_parallel function and the
+        validation report of the validate_pedigree or repair_pedigree function.
+    """
+    PED, pedigreeIndex, validationReport = validated_pedigree(PED, build_pedigree_index(PED), repair)
+    if missingnessColumn is not None:
+        missingness_index(PED, pedigreeIndex, missingnessColumn)
+    lessRelatedDatabase = None
+    if engine != "mis" and maxKinship is None:
+        lessRelatedDatabase = less_related(PED)
+    proposed_participants, selectionReport = select_participants_parallel(lessRelatedDatabase, pedigreeIndex, engine,
+                                                                          workers, exactLimit, timeLimit,
+                                                                          maxKinship = maxKinship, seed = seed,
+                                                                          tieBreak = tieBreak,
+                                                                          preferredAff = preferredAff)
+    annotatedPED = PED.copy()
+    annotatedPED["selection_status"] = selection_status(PED, proposed_participants)
+    return(annotatedPED, selectionReport, validationReport)
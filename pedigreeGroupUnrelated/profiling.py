@@ -0,0 +1,104 @@
+import json
+import os
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+
+
+_tracedPeaks = []
+
+def new_profiler(callbacks = None):
+    """
+    Creates the profiler filled by the profile_stage function and starts tracing memory allocations.
+    Args:
+      optional:
+          callbacks: functions called with every record as soon as it is measured. A record is a dictionary with the
+          stage name, the family ID (None for a whole stage), the wall and CPU seconds and the peak traced memory in MB.
+    Returns:
+        A dictionary with the totals of every stage, the records of every family, the callbacks and whether this
+        profiler started tracing, in which case the caller stops it once the profile is written.
+    """
+    startedTracing = not tracemalloc.is_tracing()
+    if startedTracing:
+        tracemalloc.start()
+    return({"stages": {}, "families": [], "callbacks": list(callbacks or []), "startedTracing": startedTracing})
+
+def add_profile_record(profiler, record):
+    """
+    Adds a record to the totals of its stage, keeps it when it belongs to a family, and passes it to the callbacks.
+    Args:
+      minimum:
+          profiler: The output of the new_profiler function.
+          record: a record as measured by the profile_stage function.
+    """
+    totals = profiler["stages"].setdefault(record["stage"], {"calls": 0, "wall": 0.0, "cpu": 0.0, "peakMB": 0.0})
+    totals["calls"] += 1
+    totals["wall"] += record["wall"]
+    totals["cpu"] += record["cpu"]
+    totals["peakMB"] = max(totals["peakMB"], record["peakMB"])
+    if record["family"] is not None:
+        profiler["families"].append(record)
+    for callback in profiler["callbacks"]:
+        callback(record)
+
+@contextmanager
+def profile_stage(profiler, stage, family = None):
+    """
+    Measures the wall time, the CPU time of this process and the peak traced memory of the block it wraps, and adds the
+    record to the profiler. Stages may be nested, the peak of a stage includes the peaks of the stages it contains.
+    Nothing is measured when the profiler is None.
+    Args:
+      minimum:
+          profiler: The output of the new_profiler function, or None.
+          stage: name of the stage.
+      optional:
+          family: family ID, for the records of a single family.
+    """
+    if profiler is None:
+        yield
+        return
+    if len(_tracedPeaks) > 0:
+        _tracedPeaks[-1] = max(_tracedPeaks[-1], tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+    _tracedPeaks.append(0)
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield
+    finally:
+        peak = max(_tracedPeaks.pop(), tracemalloc.get_traced_memory()[1])
+        if len(_tracedPeaks) > 0:
+            _tracedPeaks[-1] = max(_tracedPeaks[-1], peak)
+        add_profile_record(profiler, {"stage": stage, "family": family, "wall": time.perf_counter() - wall,
+                                      "cpu": time.process_time() - cpu, "peakMB": peak / 1e6})
+
+def profile_iterator(profiler, stage, iterator):
+    """
+    Yields the items of an iterator, measuring the time spent producing each of them as the given stage.
+    """
+    iterator = iter(iterator)
+    end = object()
+    while True:
+        with profile_stage(profiler, stage):
+            item = next(iterator, end)
+        if item is end:
+            return
+        yield item
+
+def write_profile_report(profiler, save_dir):
+    """
+    Exports the records of a profiler as profile_report.json, with the totals of every stage and the records of every
+    family, and prints the totals of every stage.
+    Args:
+      minimum:
+          profiler: The output of the new_profiler function.
+          save_dir: Directory where to save results
+    """
+    os.makedirs(save_dir, exist_ok = True)
+    report = {"stages": profiler["stages"], "families": profiler["families"]}
+    with open(save_dir + 'profile_report.json', 'w') as reportFile:
+        json.dump(report, reportFile, indent = 1, default = lambda e: e.item() if hasattr(e, "item") else str(e))
+    for stage, totals in profiler["stages"].items():
+        print(stage + "\t" + str(totals["calls"]) + " calls\t" + format(totals["wall"], ".3f") + " s wall\t" +
+              format(totals["cpu"], ".3f") + " s CPU\t" + format(totals["peakMB"], ".1f") + " MB peak")
@@ -0,0 +1,497 @@
+import numpy as np
+import os
+
+from functools import partial
+
+from .pedigree import (balanced_batches, build_pedigree_index, family_index, family_offsets, load_cache_index,
+                       run_family_batches)
+from .profiling import add_profile_record, new_profiler, profile_stage
+
+
+def individual_profile (filteredPED, familyIndex = None, keep = None):
+    """
+    To enable pedigree visualization using graphviz, individuals are characterized. Each individual is annotated with
+    the following information: descendants, ascendants, partners, sex, classifier and generation
+    Args:
+      minimum:
+          filteredPED: A PED file is required. The column name of the data corresponding to the family ID must be
+          'famid', likewise the individual ID must be 'id', father ID must be set as 'fid', mother ID as 'mid' and sex
+          as 'sex'. selection_status is set as classifier but it could be interchange to codition for example. It only allows
+          a PED file with only one family ID.
+      optional:
+          familyIndex: The output of the family_index function for the family, its rows must match the rows of
+          filteredPED. It is built from filteredPED when not given.
+          keep: integer codes of the individuals to profile, such as the output of the prune_family function. Links to
+          the other individuals are left out. Every individual is profiled when not given.
+    Returns:
+        A dictionary which contains as entries, the individuals included. Each individual is labeled with the
+        descendants, ascendants, partners, sex, classifier and generation variables.
+    """
+    if familyIndex is None:
+        familyIndex = family_index(build_pedigree_index(filteredPED), filteredPED["famid"].iloc[0])
+    ids = familyIndex["ids"].tolist()
+    sex = familyIndex["sex"].tolist()
+    father = familyIndex["father"].tolist()
+    mother = familyIndex["mother"].tolist()
+    childPtr = familyIndex["childPtr"].tolist()
+    children = familyIndex["children"].tolist()
+    classifier = filteredPED["selection_status"].tolist()
+    if keep is None:
+        keep = range(0, len(ids))
+        included = [True] * len(ids)
+    else:
+        included = [False] * len(ids)
+        for i in keep:
+            included[i] = True
+    individualProfileDatabase = {}
+    for i in keep:
+        ascendants = [ids[e] for e in [father[i], mother[i]] if e != -1 and included[e]]
+        descendants = set()
+        partners = set()
+        for e in children[childPtr[i]:childPtr[i + 1]]:
+            if included[e]:
+                descendants.add(ids[e])
+            for partner in [father[e], mother[e]]:
+                if partner != -1 and partner != i and included[partner]:
+                    partners.add(ids[partner])
+        individualProfileDatabase[ids[i]]  = {"descendants": descendants}
+        individualProfileDatabase[ids[i]]["ascendants"]  = ascendants
+        individualProfileDatabase[ids[i]]["partners"]  = partners
+        individualProfileDatabase[ids[i]]["sex"]  = sex[i]
+        individualProfileDatabase[ids[i]]["classifier"]  = classifier[i]
+    generation = generation_layers(familyIndex)
+    for i in keep:
+        individualProfileDatabase[ids[i]]["generation"]  = [generation[i], 1]
+    return(individualProfileDatabase)
+
+def generation_layers(familyIndex):
+    """
+    Assigns a generation to every individual of a family with a breadth first search over the parent-child links
+    (one generation apart) and the partner links (same generation), so that every individual and every link is visited
+    once. Each connected component is searched on its own and shifted so that its earliest generation is 0. When the
+    links of a malformed pedigree disagree, the first generation reached is kept.
+    Args:
+      minimum:
+          familyIndex: The output of the family_index function.
+    Returns:
+        A list with the generation of every integer code of the family.
+    """
+    father = familyIndex["father"].tolist()
+    mother = familyIndex["mother"].tolist()
+    childPtr = familyIndex["childPtr"].tolist()
+    children = familyIndex["children"].tolist()
+    generation = [None] * len(father)
+    for root in range(0, len(father)):
+        if generation[root] is not None:
+            continue
+        generation[root] = 0
+        component = [root]
+        for i in component:
+            links = [[e, -1] for e in [father[i], mother[i]] if e != -1]
+            for e in children[childPtr[i]:childPtr[i + 1]]:
+                links.append([e, 1])
+                links.extend([[partner, 0] for partner in [father[e], mother[e]] if partner != -1 and partner != i])
+            for e, step in links:
+                if generation[e] is None:
+                    generation[e] = generation[i] + step
+                    component.append(e)
+        earliest = min(generation[e] for e in component)
+        for e in component:
+            generation[e] -= earliest
+    return(generation)
+
+def gen_stratification(individualProfileDatabase):
+    """
+    To enable pedigree visualization using graphviz, node information is generated from the data outputed by the
+    individual_profile function.
+
+    Individuals are bucketed by generation in a single pass, and the couples already added to a generation are kept in
+    a set, so every individual and every partner link is visited once.
+
+    Args:
+      minimum:
+          individualProfileDatabase: The output of tbe individual_profile function. A dictionary which
+          contains as entries, the individuals included. Each individual is labeled with the descendants,
+          ascendants, partners, sex, classifier and generation variables.
+
+    Returns:
+        genNodes: information required to build nodes each generation.
+        descNode: information required to build nodes that link the descendants with the ascendants.
+    """
+    generations = {}
+    for e in individualProfileDatabase:
+        generations.setdefault(individualProfileDatabase[e]["generation"][0], []).append(e)
+    genNodes = {}
+    descNode = {}
+    for i in range(min(generations), max(generations) + 1):
+        genNodes[i] = []
+        descNode[i + 0.5] = []
+        couples = set()
+        for e in generations.get(i, []):
+            profile = individualProfileDatabase[e]
+            genNodes[i].append([str(e), profile["sex"], profile["classifier"]])
+            if len(profile["partners"]) != 0:
+                for partner in profile["partners"]:
+                    if (partner, e) in couples or (e, partner) in couples:
+                        pass
+                    else:
+                        couples.add((partner, e))
+                        genNodes[i].append([partner, e])
+                        if len(profile["descendants"]) != 0:
+                            descNode[i + 0.5].append([partner, e])
+            else:
+                if len(profile["descendants"]) != 0:
+                    descNode[i + 0.5].append(e)
+    return(genNodes, descNode)
+
+def family_relatives(familyIndex):
+    """
+    Relatives of every individual of a family: the integer codes of its ascendants, descendants and partners, in this
+    order.
+    """
+    father = familyIndex["father"].tolist()
+    mother = familyIndex["mother"].tolist()
+    childPtr = familyIndex["childPtr"].tolist()
+    children = familyIndex["children"].tolist()
+    links = []
+    for i in range(0, len(father)):
+        related = [e for e in [father[i], mother[i]] if e != -1]
+        descendants = children[childPtr[i]:childPtr[i + 1]]
+        related.extend(descendants)
+        for e in descendants:
+            related.extend([partner for partner in [father[e], mother[e]] if partner != -1 and partner != i])
+        links.append(related)
+    return(links)
+
+def prune_family(familyIndex, classifier, maxNodes, depth = 2):
+    """
+    Reduces the pedigree of a large family to a readable graph of bounded size, before any individual is profiled.
+    Individuals are kept by a breadth first search from the selected individuals (classifier 2) over the ascendant,
+    descendant and partner links, up to depth links away and until maxNodes individuals are kept. The remaining
+    individuals are split in connected groups, and the groups that first meet the same kept individual are collapsed
+    into one summary node, linked to the kept individuals they are related to, so there is at most one summary node per
+    kept individual. Each individual and link is visited a bounded number of times, so the time is linear in the size
+    of the family.
+    Args:
+      minimum:
+          familyIndex: The output of the family_index function.
+          classifier: the selection_status of every integer code of the family.
+          maxNodes: largest number of individuals kept.
+      optional:
+          depth: largest number of links between a kept individual and the closest selected individual.
+    Returns:
+        The integer codes of the kept individuals, in order of the search, to pass to the individual_profile function,
+        and a list of [summary node name, label, related kept individuals] summaries.
+    """
+    ids = familyIndex["ids"].tolist()
+    links = family_relatives(familyIndex)
+    seeds = [i for i in range(0, len(ids)) if classifier[i] == 2]
+    if len(seeds) == 0:
+        seeds = [0]
+    distance = {}
+    queue = []
+    for i in seeds[:maxNodes]:
+        distance[i] = 0
+        queue.append(i)
+    for i in queue:
+        if distance[i] == depth:
+            continue
+        for relative in links[i]:
+            if len(distance) >= maxNodes:
+                break
+            if relative not in distance:
+                distance[relative] = distance[i] + 1
+                queue.append(relative)
+    anchored = {}
+    grouped = set()
+    for start in range(0, len(ids)):
+        if start in distance or start in grouped:
+            continue
+        grouped.add(start)
+        group = [start]
+        related = []
+        for i in group:
+            for relative in links[i]:
+                if relative in distance:
+                    if relative not in related:
+                        related.append(relative)
+                elif relative not in grouped:
+                    grouped.add(relative)
+                    group.append(relative)
+        anchor = related[0] if len(related) > 0 else None
+        summary = anchored.setdefault(anchor, [0, 0, []])
+        summary[0] += len(group)
+        summary[1] += sum(1 for i in group if classifier[i] == 2)
+        summary[2].extend([i for i in related if i not in summary[2]])
+    summaries = []
+    for individuals, selected, related in anchored.values():
+        label = "+" + str(individuals) + " individuals\n" + str(selected) + " selected"
+        summaries.append(["summary_" + str(len(summaries)), label, [ids[i] for i in related]])
+    return(queue, summaries)
+
+def dot_output_path(save_dir, family):
+    """
+    Path of the DOT source of the pedigree graph of a family.
+    """
+    return(save_dir + 'pedigree_family_' + str(family) + '.gv')
+
+def graph_pedigree(individualProfileDatabase, family, genNodes, descNode, save_dir, summaries = None):
+    """
+    The pedigree is graphed using graphviz library, interface for DOT engine. Diferenciates by colour the
+    individuals acording to its classifier status.
+    Args:
+      minimum:
+          individualProfileDatabase: The output of tbe individual_profile function. A dictionary which
+          contains as entries, the individuals included. Each individual is labeled with the descendants,
+          ascendants, partners, sex, classifier and generation variables.
+          family: The family to being graphed.
+          genNodes: information required to build nodes each generation. Generated with the gen_stratification function.
+          descNode: information required to build nodes that link the descendants with the ascendants. Generated with
+          the gen_stratification function.
+          save_dir: Directory where to save results
+      optional:
+          summaries: summary nodes of the individuals left out of the graph, from the prune_family function.
+    Returns:
+          Exports the DOT source of the pedigree graph as pedigree_family_<family>.gv, diferenciates by colour the
+          individuals acording to its classifier status. The source is only rewritten when it changed, so unchanged
+          families are skipped by the render_dot_files function. Returns the path of the DOT source and whether it
+          changed.
+    """
+    from graphviz import Graph
+    pedGen = set()
+    for i in individualProfileDatabase:
+        pedGen.add(individualProfileDatabase[i]["generation"][0])
+    dot = Graph(engine='DOT', comment="ped_", graph_attr = {'splines':'ortho', 'concentrate': 'true'}, strict = True)
+    couples = {}
+    for i in genNodes:
+        couples[i] = {(e[0], e[1]) for e in genNodes[i] if len(e) == 2}
+    for i in range(min(pedGen), max(pedGen) + 1):
+        with dot.subgraph(name = str(i)) as subs:
+            subs.attr(rank = 'same')
+            for e in genNodes[i]:
+                #set format
+                if (len(e) == 3):
+                    if e[1] == 1:
+                        shape = "rect"
+                    else:
+                        shape = "ellipse"
+                    if e[2] == 2:
+                        color = "green"
+                    else:
+                        color = "red"
+                    subs.node(e[0], shape = shape, style='filled', color = color)
+                else:
+                    nodeName = str(e[0]) + "_" + str(e[1])
+                    subs.node(nodeName, shape = "point")
+                    subs.edge(str(e[0]), nodeName)
+                    subs.edge(nodeName, str(e[1]))
+        with dot.subgraph(name = str(i + 0.5)) as subs:
+            for e in descNode[i + 0.5]:
+                if i == (max(pedGen)):
+                    pass
+                else:
+                    if type(e) == list:
+                        nodeName = str(e[0]) + "_" + str(e[1])
+                        intergenNodeName = nodeName + "_desc"
+                        subs.node(intergenNodeName , shape = "point")
+                        subs.edge(nodeName, intergenNodeName)
+                    else:
+                        nodeName = str(e)
+                        intergenNodeName = nodeName + "_desc"
+                        subs.node(intergenNodeName , shape = "point")
+                        subs.edge(nodeName, intergenNodeName)
+        if i == min(pedGen):
+            pass
+        else:
+            for e in genNodes[i]:
+                if type(e[0]) == str:
+                    e = int(e[0])
+                    ascendants = individualProfileDatabase[e]["ascendants"]
+                    if len(ascendants) == 1:
+                        if len(individualProfileDatabase[ascendants[0]]["descendants"]) != 1:
+                            intergenNodeName = str(ascendants[0]) + "_desc"
+                            dot.node(intergenNodeName , shape = "point")
+                            dot.edge(str(ascendants[0]), intergenNodeName)
+                            dot.edge(intergenNodeName, str(e))
+                        else:
+                            intergenNodeName = str(ascendants[0]) + "_desc"
+                            dot.edge(intergenNodeName, str(e))
+                    elif len(ascendants) == 2:
+                        if (ascendants[0], ascendants[1]) in couples[i - 1]:
+                            intergenNodeName = str(ascendants[0]) + "_" + str(ascendants[1]) + "_desc"
+                            dot.edge(intergenNodeName, str(e))
+                        elif (ascendants[1], ascendants[0]) in couples[i - 1]:
+                            intergenNodeName = str(ascendants[1]) + "_" + str(ascendants[0]) + "_desc"
+                            dot.edge(intergenNodeName, str(e))
+                        else:
+                            #parents of different generations, reported by the validate_pedigree function
+                            for ascendant in ascendants:
+                                dot.edge(str(ascendant), str(e))
+                    else:
+                        pass
+                else:
+                    pass
+    for nodeName, label, related in summaries or []:
+        dot.node(nodeName, label = label, shape = "note", style = "dashed")
+        for e in related:
+            dot.edge(str(e), nodeName, style = "dashed")
+    dot.node("Family ID: " + str(family), shape = "box")
+    dotPath = dot_output_path(save_dir, family)
+    if os.path.exists(dotPath):
+        with open(dotPath, encoding = 'utf-8') as previous:
+            if previous.read() == dot.source:
+                return([dotPath, False])
+    dot.save(dotPath)
+    return([dotPath, True])
+
+def render_family_batch(batch, save_dir, profile = False, maxNodes = None, depth = 2, cacheDir = None):
+    """
+    Process pool task of the render_pedigrees function.
+    Args:
+      minimum:
+          batch: a list of [family ID, family index, annotated PED rows of the family] items. When cacheDir is given,
+          the family index is replaced by the output of the family_offsets function and the rows only hold the
+          selection_status column.
+          save_dir: Directory where to save results
+      optional:
+          profile: measure the graph of every family with the profile_stage function.
+          maxNodes, depth: families with more than maxNodes individuals are reduced with the prune_family function.
+          cacheDir: as in the render_pedigrees function.
+    Returns:
+        A list with the output of the graph_pedigree function for every family of the batch, followed by the profile
+        record of the family, None unless profile is set.
+    """
+    cachedIndex = load_cache_index(cacheDir) if cacheDir is not None else None
+    dotFiles = []
+    for family, familyIndex, filteredPED in batch:
+        if cachedIndex is not None:
+            familyIndex = family_index(cachedIndex, family, familyIndex)
+        familyProfiler = new_profiler() if profile else None
+        with profile_stage(familyProfiler, "graph_family", family):
+            keep = None
+            summaries = None
+            if maxNodes is not None and len(familyIndex["ids"]) > maxNodes:
+                keep, summaries = prune_family(familyIndex, filteredPED["selection_status"].tolist(), maxNodes, depth)
+            individualProfileDatabase = individual_profile(filteredPED, familyIndex, keep)
+            genNodes, descNode = gen_stratification(individualProfileDatabase)
+            dotFile = graph_pedigree(individualProfileDatabase, family, genNodes, descNode, save_dir, summaries)
+        dotFiles.append(dotFile + [familyProfiler["families"][0] if profile else None])
+    return(dotFiles)
+
+def render_dot_files(dotPaths, renderJobs = None, view = False):
+    """
+    Renders DOT sources to SVG with a bounded pool of concurrent dot processes. A source is skipped when its SVG
+    exists and is newer than the source, which is the case for families whose DOT output did not change.
+    Args:
+      minimum:
+          dotPaths: paths of the DOT sources, as returned by the graph_pedigree function.
+      optional:
+          renderJobs: maximum number of concurrent dot processes, the number of CPUs by default.
+          view: open every rendered SVG with the default viewer.
+    Returns:
+        The paths of the SVG files that were rendered.
+    """
+    pending = []
+    for dotPath in dotPaths:
+        svgPath = dotPath + '.svg'
+        if not os.path.exists(svgPath) or os.path.getmtime(svgPath) < os.path.getmtime(dotPath):
+            pending.append(dotPath)
+    if len(pending) == 0:
+        return([])
+    import graphviz
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers = renderJobs or os.cpu_count() or 1) as pool:
+        svgPaths = list(pool.map(partial(graphviz.render, 'dot', 'svg'), pending))
+    if view:
+        for svgPath in svgPaths:
+            graphviz.view(svgPath)
+    return(svgPaths)
+
+def renderable_families(annotatedPED, pedigreeIndex, minSize = None, maxSize = None, status = None):
+    """
+    Filters the families to graph by size and by selection status.
+    Args:
+      minimum:
+          annotatedPED: The output of the ped_annotate_selected function.
+          pedigreeIndex: The output of the build_pedigree_index function, built from the same PED file.
+      optional:
+          minSize, maxSize: bounds, inclusive, of the number of individuals of the families to graph.
+          status: only graph families with at least one individual with this selection_status value.
+    Returns:
+        The list of family IDs to graph, in order of appearance.
+    """
+    families = np.array(pedigreeIndex["families"], dtype = object)
+    sizes = np.diff(pedigreeIndex["offsets"])
+    keep = np.ones(len(families), dtype = bool)
+    if minSize is not None:
+        keep &= sizes >= minSize
+    if maxSize is not None:
+        keep &= sizes <= maxSize
+    if status is not None:
+        familyCodes = np.repeat(np.arange(len(families)), sizes)
+        matches = annotatedPED["selection_status"].to_numpy()[pedigreeIndex["rows"]] == status
+        keep &= np.bincount(familyCodes[matches], minlength = len(families)) > 0
+    return(families[keep].tolist())
+
+def render_pedigrees(annotatedPED, pedigreeIndex, save_dir, workers = 1, renderJobs = None, dotOnly = False,
+                     view = False, minSize = None, maxSize = None, status = None, families = None, profiler = None,
+                     maxNodes = None, depth = 2, cacheDir = None):
+    """
+    Graphs the pedigree of the families without any interaction. The DOT sources are written first, sharding the
+    families across a process pool with the balanced_batches function, and then rendered with the render_dot_files
+    function.
+    Args:
+      minimum:
+          annotatedPED: The output of the ped_annotate_selected function.
+          pedigreeIndex: The output of the build_pedigree_index function, built from the same PED file.
+          save_dir: Directory where to save results
+      optional:
+          workers: number of worker processes writing the DOT sources.
+          renderJobs, view: as in the render_dot_files function.
+          dotOnly: only write the DOT sources.
+          minSize, maxSize, status: as in the renderable_families function.
+          families: only write the DOT sources of these families. The existing sources of the other families are
+          passed to the render_dot_files function, so their SVG is rendered when missing or outdated.
+          profiler: the output of the new_profiler function, the graph of every family is added to it.
+          maxNodes, depth: as in the prune_family function, only families with more than maxNodes individuals are
+          reduced. Every family is graphed whole when maxNodes is None.
+          cacheDir: as in the select_participants_parallel function, the workers only receive the offsets and the
+          selection status of their families.
+    Returns:
+        The paths of the DOT sources of the graphed families.
+    """
+    os.makedirs(save_dir, exist_ok = True)
+    requested = families
+    families = renderable_families(annotatedPED, pedigreeIndex, minSize, maxSize, status)
+    reusedPaths = []
+    if requested is not None:
+        requested = set(requested)
+        for family in families:
+            if family not in requested and os.path.exists(dot_output_path(save_dir, family)):
+                reusedPaths.append(dot_output_path(save_dir, family))
+        families = [family for family in families if family in requested]
+    batches = []
+    for batch in balanced_batches(pedigreeIndex, families, workers):
+        items = []
+        for family in batch:
+            if cacheDir is not None:
+                start, stop = family_offsets(pedigreeIndex, family)
+                rows = pedigreeIndex["rows"][start:stop]
+                items.append([family, [start, stop], annotatedPED[["selection_status"]].iloc[rows].reset_index()])
+            else:
+                familyIndex = family_index(pedigreeIndex, family)
+                items.append([family, familyIndex, annotatedPED.iloc[familyIndex["rows"]].reset_index()])
+        batches.append(items)
+    dotPaths = []
+    task = partial(render_family_batch, save_dir = save_dir, profile = profiler is not None, maxNodes = maxNodes,
+                   depth = depth, cacheDir = cacheDir)
+    with profile_stage(profiler, "write_dot_files"):
+        for dotFiles in run_family_batches(task, batches, workers):
+            for dotPath, changed, record in dotFiles:
+                dotPaths.append(dotPath)
+                if record is not None:
+                    add_profile_record(profiler, record)
+    if not dotOnly:
+        with profile_stage(profiler, "render_dot_files"):
+            render_dot_files(dotPaths + reusedPaths, renderJobs, view)
+    return(dotPaths)
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+@pytest.fixture
+def chain_ped():
+    """
+    Builds a PED file of one family where every individual is the only child of the previous one, through the father.
+    The IDs are 1 to size, or i1 to i<size> when textIds is set, and the phenotype column is added when given.
+    """
+    def build(size, famid = 1, textIds = False, phenotype = None):
+        ids = list(range(1, size + 1))
+        missing = 0
+        if textIds:
+            ids = ["i" + str(e) for e in ids]
+            missing = "0"
+        PED = pd.DataFrame({"famid": famid, "id": ids, "fid": [missing] + ids[:-1], "mid": missing, "sex": 1, "aff": 1})
+        if phenotype is not None:
+            PED["phenotype"] = phenotype
+        return(PED)
+    return(build)
@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+import pytest
+
+from pedigreeGroupUnrelated import cached_pedigree, family_index, run_pipeline, select_unrelated
+
+
+def test_cache_reads_text_columns(tmp_path, chain_ped):
+    pedigreeFile = str(tmp_path / "text.ped")
+    PED = chain_ped(20, famid = "FAM", textIds = True, phenotype = ["case", "control"] * 10)
+    PED.to_csv(pedigreeFile, sep = '\t', index = False)
+    for run in range(0, 2):
+        PED, pedigreeIndex = cached_pedigree(pedigreeFile, str(tmp_path / "cache"))
+        assert PED["famid"].tolist() == ["FAM"] * 20
+        assert PED["phenotype"].tolist()[:2] == ["case", "control"]
+        assert family_index(pedigreeIndex, "FAM")["ids"].tolist()[0] == "i1"
+
+def test_cache_offsets_at_integer_type_limits(tmp_path, chain_ped):
+    for size in [127, 128, 32767]:
+        pedigreeFile = str(tmp_path / (str(size) + ".ped"))
+        chain_ped(size, famid = "FAM", textIds = True).to_csv(pedigreeFile, sep = '\t', index = False)
+        PED, pedigreeIndex = cached_pedigree(pedigreeFile, str(tmp_path / ("cache" + str(size))))
+        familyIndex = family_index(pedigreeIndex, "FAM")
+        assert len(familyIndex["ids"]) == size
+        assert familyIndex["childPtr"].tolist()[-1] == size - 1
+        annotatedPED, report, validationReport = select_unrelated(pd.DataFrame(PED), engine = "mis")
+        assert report["FAM"]["size"] == 1
+
+def test_cached_workers_match_in_memory_run(tmp_path, chain_ped):
+    pytest.importorskip("graphviz")
+    pedigreeFile = str(tmp_path / "families.ped")
+    families = [chain_ped(size, famid) for famid, size in enumerate([3, 9, 40, 5])]
+    pd.concat(families).to_csv(pedigreeFile, sep = '\t', index = False)
+    for engine in ["lineage", "mis"]:
+        outputs = []
+        for cache in [None, str(tmp_path / "cache")]:
+            resultsDirectory = str(tmp_path / (engine + str(cache is None))) + "/"
+            run_pipeline(pedigreeFile, resultsDirectory, engine = engine, workers = 2, seed = 3, cache = cache,
+                         dotOnly = True)
+            dotFiles = sorted(e for e in os.listdir(resultsDirectory) if e.endswith(".gv"))
+            dotSources = [open(os.path.join(resultsDirectory, e)).read() for e in dotFiles]
+            outputs.append([open(resultsDirectory + "pedigree_selection.ped").read(), dotFiles, dotSources])
+        assert len(outputs[0][1]) == 4
+        assert outputs[0] == outputs[1]
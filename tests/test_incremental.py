@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+from pedigreeGroupUnrelated import run_pipeline
+
+graphviz = pytest.importorskip("graphviz")
+
+PEDIGREE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_pedigree.ped")
+
+
+def dot_sources(resultsDirectory):
+    sources = {}
+    for name in sorted(os.listdir(resultsDirectory)):
+        if name.endswith(".gv"):
+            with open(os.path.join(resultsDirectory, name)) as dotFile:
+                sources[name] = dotFile.read()
+    return(sources)
+
+def test_incremental_run_renders_graphs_of_a_dot_only_run(tmp_path, monkeypatch):
+    import pedigreeGroupUnrelated.render as render
+    rendered = []
+    monkeypatch.setattr(render, "render_dot_files", lambda dotPaths, renderJobs = None, view = False:
+                        rendered.extend(dotPaths))
+    resultsDirectory = str(tmp_path) + "/"
+    run_pipeline(PEDIGREE_FILE, resultsDirectory, incremental = True, dotOnly = True)
+    assert rendered == []
+    run_pipeline(PEDIGREE_FILE, resultsDirectory, incremental = True)
+    assert sorted(os.path.basename(e) for e in rendered) == sorted(dot_sources(resultsDirectory))
+
+def test_incremental_run_rewrites_graphs_when_graph_settings_change(tmp_path):
+    resultsDirectory = str(tmp_path) + "/"
+    run_pipeline(PEDIGREE_FILE, resultsDirectory, incremental = True, dotOnly = True)
+    full = dot_sources(resultsDirectory)
+    run_pipeline(PEDIGREE_FILE, resultsDirectory, incremental = True, dotOnly = True, graphMaxNodes = 3, graphDepth = 0)
+    pruned = dot_sources(resultsDirectory)
+    assert full.keys() == pruned.keys()
+    assert full != pruned
+    run_pipeline(PEDIGREE_FILE, resultsDirectory, incremental = True, dotOnly = True)
+    assert dot_sources(resultsDirectory) == full
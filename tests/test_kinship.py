@@ -0,0 +1,96 @@
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from pedigreeGroupUnrelated import build_pedigree_index, family_index, kinship_index, select_unrelated
+from pedigreeGroupUnrelated.pedigree import ancestor_row, kinship_graph, kinship_greedy
+
+
+def random_pedigree(size, founders, seed):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(0, size):
+        sex = 1 + i % 2
+        father = mother = "0"
+        if i >= founders:
+            males = [e[1] for e in rows if e[4] == 1]
+            females = [e[1] for e in rows if e[4] == 2]
+            father = rng.choice(males) if rng.random() < 0.9 else "0"
+            mother = rng.choice(females) if rng.random() < 0.9 else "0"
+        rows.append(["F", "i" + str(i), father, mother, sex, 1])
+    return(pd.DataFrame(rows, columns = ["famid", "id", "fid", "mid", "sex", "aff"]))
+
+def deep_pedigree(generations, founders, perGeneration, seed):
+    rng = random.Random(seed)
+    rows = [["F", "f" + str(i), "0", "0", 1 + i % 2, 1] for i in range(0, founders)]
+    previous = rows
+    for g in range(0, generations):
+        males = [e[1] for e in previous if e[4] == 1]
+        females = [e[1] for e in previous if e[4] == 2]
+        previous = [["F", "g" + str(g) + "_" + str(i), rng.choice(males), rng.choice(females), 1 + i % 2, 1]
+                    for i in range(0, perGeneration)]
+        rows.extend(previous)
+    return(pd.DataFrame(rows, columns = ["famid", "id", "fid", "mid", "sex", "aff"]))
+
+def dense_relationship(familyIndex):
+    father = familyIndex["father"].tolist()
+    mother = familyIndex["mother"].tolist()
+    order = kinship_index(familyIndex)["rank"]
+    order = sorted(range(0, len(father)), key = order.__getitem__)
+    A = np.zeros((len(father), len(father)))
+    for i in order:
+        for j in order[:order.index(i)]:
+            A[i, j] = A[j, i] = 0.5 * sum(A[j, p] for p in [father[i], mother[i]] if p != -1)
+        A[i, i] = 1.0
+        if father[i] != -1 and mother[i] != -1:
+            A[i, i] += 0.5 * A[father[i], mother[i]]
+    return(A)
+
+def test_kinship_index_matches_dense_relationship_matrix():
+    for seed in range(0, 5):
+        familyIndex = family_index(build_pedigree_index(random_pedigree(40, 6, seed)), "F")
+        kinshipIndex = kinship_index(familyIndex)
+        A = dense_relationship(familyIndex)
+        assert np.allclose(kinshipIndex["F"], np.diag(A) - 1)
+        D = np.array(kinshipIndex["D"])
+        rows = {}
+        for i in kinshipIndex["order"]:
+            rows[i] = ancestor_row(kinshipIndex, rows, i)
+        for i, rowI in rows.items():
+            for j, rowJ in rows.items():
+                a = sum(l * rowJ[k] * D[k] for k, l in rowI.items() if k in rowJ)
+                assert abs(a - A[i, j]) < 1e-9
+
+def test_kinship_graph_matches_dense_relationship_matrix():
+    familyIndex = family_index(build_pedigree_index(random_pedigree(30, 5, 7)), "F")
+    A = dense_relationship(familyIndex)
+    adjacency = kinship_graph(kinship_index(familyIndex), 0.05)
+    for i in range(0, len(adjacency)):
+        for j in range(0, len(adjacency)):
+            if i != j:
+                assert bool(adjacency[i] >> j & 1) == (A[i, j] / 2 > 0.05)
+
+def test_kinship_greedy_respects_threshold():
+    familyIndex = family_index(build_pedigree_index(random_pedigree(60, 8, 3)), "F")
+    A = dense_relationship(familyIndex)
+    chosen = kinship_greedy(kinship_index(familyIndex), 0.05, time.perf_counter() + 10)
+    selected = [i for i in range(0, len(A)) if chosen >> i & 1]
+    assert selected
+    assert all(A[i, j] / 2 <= 0.05 for i in selected for j in selected if i != j)
+
+def test_expired_deadline_keeps_founders():
+    PED = deep_pedigree(15, 40, 60, 0)
+    familyIndex = family_index(build_pedigree_index(PED), "F")
+    kinshipIndex = kinship_index(familyIndex, time.perf_counter() - 1)
+    chosen = kinship_greedy(kinshipIndex, 0.05, time.perf_counter() - 1)
+    assert bin(chosen).count("1") == 40
+
+def test_deep_pedigree_selection_is_never_empty():
+    PED = deep_pedigree(15, 40, 60, 1)
+    for timeLimit in [0.0, 0.01, 10.0]:
+        annotatedPED, report, validationReport = select_unrelated(PED, maxKinship = 0.05, timeLimit = timeLimit)
+        assert report["F"]["size"] >= 40
+    selected = annotatedPED.loc[annotatedPED["selection_status"] == 2, "id"]
+    assert selected.str.startswith("g").any()
@@ -0,0 +1,30 @@
+import pandas as pd
+
+from pedigreeGroupUnrelated import (build_pedigree_index, family_index, less_related, lineage_groups, redundants,
+                                    select_unrelated)
+
+
+def test_deep_chain_is_one_lineage(chain_ped):
+    depth = 10000
+    PED = chain_ped(depth)
+    lessRelatedDatabase = less_related(PED)
+    familyIndex = family_index(build_pedigree_index(PED), 1)
+    for index in [None, familyIndex]:
+        lineages, depths = lineage_groups(lessRelatedDatabase, 1, index, depths = True)
+        assert lineages == [list(range(1, depth + 1))]
+        assert depths[depth] == depth - 1
+        assert redundants(lessRelatedDatabase, 1, depth, index) == list(range(1, depth + 1))
+
+def test_deep_chain_selects_one_individual(chain_ped):
+    annotatedPED, report, validationReport = select_unrelated(chain_ped(10000), seed = 0)
+    assert (annotatedPED["selection_status"] == 2).sum() == 1
+
+def test_branching_lineages_and_single_parent_cycles():
+    PED = pd.DataFrame({"famid": 1, "id": [1, 2, 3, 4, 5, 6, 7, 8], "fid": [0, 1, 1, 2, 0, 5, 8, 7], "mid": 0,
+                        "sex": 1, "aff": 1})
+    lessRelatedDatabase = less_related(PED)
+    familyIndex = family_index(build_pedigree_index(PED), 1)
+    for index in [None, familyIndex]:
+        lineages = lineage_groups(lessRelatedDatabase, 1, index)
+        assert sorted(sorted(lineage) for lineage in lineages) == [[1, 2, 3, 4], [5, 6], [7, 8]]
+        assert redundants(lessRelatedDatabase, 1, 4, index) == [1, 2, 4]
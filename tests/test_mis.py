@@ -0,0 +1,64 @@
+import itertools
+import random
+import time
+
+import pandas as pd
+
+from pedigreeGroupUnrelated import ancestry_roots, build_pedigree_index, family_index, select_family_mis, select_unrelated
+from pedigreeGroupUnrelated.pedigree import clique_cover_bound, iter_bits, mis_exact
+
+
+def random_graph(size, density, seed):
+    rng = random.Random(seed)
+    adjacency = [0] * size
+    for i, j in itertools.combinations(range(0, size), 2):
+        if rng.random() < density:
+            adjacency[i] |= 1 << j
+            adjacency[j] |= 1 << i
+    return(adjacency)
+
+def is_independent(adjacency, chosen):
+    return(all(adjacency[i] & chosen == 0 for i in iter_bits(chosen)))
+
+def brute_force_mis(adjacency):
+    best = 0
+    for chosen in range(0, 1 << len(adjacency)):
+        if bin(chosen).count("1") > best and is_independent(adjacency, chosen):
+            best = bin(chosen).count("1")
+    return(best)
+
+def test_mis_exact_matches_brute_force():
+    for seed in range(0, 60):
+        adjacency = random_graph(random.Random(seed).randint(1, 12), [0.1, 0.3, 0.6][seed % 3], seed)
+        chosen, optimal = mis_exact(adjacency, time.perf_counter() + 10)
+        assert optimal
+        assert is_independent(adjacency, chosen)
+        assert bin(chosen).count("1") == brute_force_mis(adjacency)
+
+def test_mis_exact_keeps_the_incumbent_when_out_of_time():
+    adjacency = random_graph(40, 0.2, 1)
+    incumbent = 1 << 39
+    chosen, optimal = mis_exact(adjacency, time.perf_counter() - 1, incumbent)
+    assert not optimal
+    assert chosen == incumbent
+
+def test_clique_cover_bound_is_an_upper_bound():
+    for seed in range(0, 30):
+        adjacency = random_graph(10, 0.4, seed)
+        assert clique_cover_bound(adjacency, (1 << 10) - 1) >= brute_force_mis(adjacency)
+
+def test_mis_engine_is_optimal_on_small_families():
+    PED = pd.DataFrame({"famid": 1, "id": [1, 2, 3, 4, 5, 6], "fid": [0, 0, 1, 1, 0, 5], "mid": [0, 0, 2, 2, 0, 0],
+                        "sex": [1, 2, 1, 2, 1, 2], "aff": 1})
+    annotatedPED, report, validationReport = select_unrelated(PED, engine = "mis")
+    assert report[1]["optimal"] and report[1]["engine"] == "exact"
+    assert report[1]["size"] == 3
+
+def test_expired_deadline_selects_the_founders():
+    PED = pd.DataFrame({"famid": 1, "id": [1, 2, 3, 4, 5, 6], "fid": [0, 0, 1, 1, 0, 3], "mid": [0, 0, 2, 2, 0, 5],
+                        "sex": [1, 2, 1, 2, 2, 1], "aff": 1})
+    familyIndex = family_index(build_pedigree_index(PED), 1)
+    assert ancestry_roots(familyIndex, time.perf_counter() - 1) is None
+    participants, report = select_family_mis(familyIndex, exactLimit = 0, timeLimit = 0.0)
+    assert participants == [1, 2, 5]
+    assert report["engine"] == "heuristic"
@@ -0,0 +1,34 @@
+import os
+
+import pandas as pd
+
+from pedigreeGroupUnrelated import balanced_batches, build_pedigree_index, less_related, select_participants_parallel
+
+PEDIGREE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_pedigree.ped")
+
+
+def test_workers_do_not_change_the_selection():
+    PED = pd.read_csv(PEDIGREE_FILE, sep = '\t')
+    pedigreeIndex = build_pedigree_index(PED)
+    lessRelatedDatabase = less_related(PED)
+    for engine in ["lineage", "mis"]:
+        results = []
+        for workers in [1, 2]:
+            participants, report = select_participants_parallel(lessRelatedDatabase, pedigreeIndex, engine, workers,
+                                                                seed = 11)
+            for family in report:
+                del report[family]["seconds"]
+            results.append([participants, report])
+        assert list(results[0][0]) == list(results[1][0]) == pedigreeIndex["families"]
+        assert results[0] == results[1]
+
+def test_balanced_batches_start_with_the_largest_families():
+    rows = []
+    for famid, size in enumerate([2, 30, 5, 30, 1, 12]):
+        for i in range(1, size + 1):
+            rows.append([famid, famid * 100 + i, 0, 0, 1, 1])
+    pedigreeIndex = build_pedigree_index(pd.DataFrame(rows, columns = ["famid", "id", "fid", "mid", "sex", "aff"]))
+    batches = balanced_batches(pedigreeIndex, pedigreeIndex["families"], 2)
+    #each batch holds at least 80 // 16 individuals, so only the two smallest families are packed together
+    assert batches == [[1], [3], [5], [2], [0, 4]]
+    assert balanced_batches(pedigreeIndex, [4, 2, 0], 1) == [[2], [0], [4]]
@@ -0,0 +1,20 @@
+import os
+import tracemalloc
+
+from pedigreeGroupUnrelated import run_pipeline
+
+PEDIGREE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_pedigree.ped")
+
+
+def test_profiled_run_stops_the_tracing_it_started(tmp_path):
+    run_pipeline(PEDIGREE_FILE, str(tmp_path) + "/", profile = True, noGraphs = True)
+    assert os.path.exists(str(tmp_path) + "/profile_report.json")
+    assert not tracemalloc.is_tracing()
+
+def test_profiled_run_keeps_the_tracing_of_the_caller(tmp_path):
+    tracemalloc.start()
+    try:
+        run_pipeline(PEDIGREE_FILE, str(tmp_path) + "/", profile = True, noGraphs = True)
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
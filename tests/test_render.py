@@ -0,0 +1,31 @@
+import pandas as pd
+
+from pedigreeGroupUnrelated import (build_pedigree_index, family_index, generation_layers, individual_profile,
+                                    prune_family)
+
+
+def test_prune_family_profiles_only_kept_individuals():
+    size = 200
+    ids = list(range(1, size + 1))
+    PED = pd.DataFrame({"famid": 1, "id": ids, "fid": [0, 0] + [1] * (size - 2), "mid": [0, 0] + [2] * (size - 2),
+                        "sex": [1, 2] * (size // 2), "aff": 1, "selection_status": [2] + [1] * (size - 1)})
+    familyIndex = family_index(build_pedigree_index(PED), 1)
+    classifier = PED["selection_status"].tolist()
+    keep, summaries = prune_family(familyIndex, classifier, 10, 1)
+    profiles = individual_profile(PED, familyIndex, keep)
+    assert len(profiles) == 10
+    assert all(relative in profiles for profile in profiles.values()
+               for relative in list(profile["descendants"]) + profile["ascendants"] + list(profile["partners"]))
+    assert sum(int(label.split(" ")[0][1:]) for name, label, related in summaries) == size - 10
+    assert all(relative in profiles for name, label, related in summaries for relative in related)
+
+def test_generation_layers():
+    #the grandchild 10 comes before its parents, 5 married in, and 20, 21 and 22 are not linked to the others
+    rows = [[10, 4, 5, 1], [4, 1, 2, 1], [1, 0, 0, 1], [2, 0, 0, 2], [5, 0, 0, 2], [3, 1, 2, 2], [22, 20, 21, 1],
+            [20, 0, 0, 1], [21, 0, 0, 2]]
+    PED = pd.DataFrame(rows, columns = ["id", "fid", "mid", "sex"])
+    PED.insert(0, "famid", 1)
+    familyIndex = family_index(build_pedigree_index(PED), 1)
+    generation = generation_layers(familyIndex)
+    layers = {e: generation[familyIndex["position"][e]] for e in familyIndex["ids"].tolist()}
+    assert layers == {1: 0, 2: 0, 3: 1, 4: 1, 5: 1, 10: 2, 20: 0, 21: 0, 22: 1}
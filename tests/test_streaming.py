@@ -0,0 +1,50 @@
+import pandas as pd
+
+from pedigreeGroupUnrelated import read_ped_families, run_pipeline, scan_families
+
+
+def families_ped():
+    #with a chunksize of 10, the family of 25 is larger than a chunk and the families of 25 and 12 cross chunk boundaries
+    rows = []
+    for famid, size in enumerate([3, 25, 4, 7, 3, 12]):
+        ids = list(range(famid * 100 + 1, famid * 100 + size + 1))
+        for i, e in enumerate(ids):
+            #two founders, then each individual is the child of the two previous ones
+            fid = ids[i - 2] if i >= 2 else 0
+            mid = ids[i - 1] if i >= 2 else 0
+            rows.append([famid, e, fid, mid, 1 if i % 2 == 0 else 2, 1 + i % 2])
+    return(pd.DataFrame(rows, columns = ["famid", "id", "fid", "mid", "sex", "aff"]))
+
+def write_ped(tmp_path, shuffled):
+    PED = families_ped()
+    if shuffled:
+        PED = PED.sample(frac = 1, random_state = 1).reset_index(drop = True)
+    pedigreeFile = str(tmp_path / ("shuffled.ped" if shuffled else "sorted.ped"))
+    PED.to_csv(pedigreeFile, sep = '\t', index = False)
+    return(PED, pedigreeFile)
+
+def test_read_ped_families_keeps_every_row(tmp_path):
+    for shuffled in [False, True]:
+        PED, pedigreeFile = write_ped(tmp_path, shuffled)
+        assert scan_families(pedigreeFile, chunksize = 10)[1] != shuffled
+        families = list(read_ped_families(pedigreeFile, chunksize = 10))
+        assert [family for family, familyPED in families] == pd.unique(PED["famid"]).tolist()
+        for family, familyPED in families:
+            assert (familyPED["famid"] == family).all()
+            assert familyPED.index.tolist() == PED.index[PED["famid"] == family].tolist()
+            assert (familyPED.to_numpy() == PED.loc[familyPED.index].to_numpy()).all()
+
+def test_streamed_selection_matches_whole_file(tmp_path):
+    for shuffled in [False, True]:
+        PED, pedigreeFile = write_ped(tmp_path, shuffled)
+        for engine in ["lineage", "mis"]:
+            outputs = []
+            for chunksize in [0, 10]:
+                resultsDirectory = str(tmp_path / (engine + str(shuffled) + str(chunksize))) + "/"
+                report = run_pipeline(pedigreeFile, resultsDirectory, engine = engine, chunksize = chunksize,
+                                      seed = 5, noGraphs = True)
+                with open(resultsDirectory + "pedigree_selection.ped") as selectionFile:
+                    lines = selectionFile.read().splitlines()
+                outputs.append([lines[0], sorted(lines[1:]), {k: v["size"] for k, v in report.items()}])
+            assert len(outputs[0][1]) == len(PED)
+            assert outputs[0] == outputs[1]
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pedigreeGroupUnrelated import select_unrelated
+
+
+def lineage_ped(missingRate):
+    PED = pd.DataFrame({"famid": 1, "id": [1, 2, 3, 4], "fid": [0, 1, 1, 1], "mid": 0, "sex": [1, 1, 2, 1], "aff": 1})
+    PED["missingRate"] = missingRate
+    return(PED)
+
+def selected(annotatedPED):
+    return(annotatedPED.loc[annotatedPED["selection_status"] == 2, "id"].tolist())
+
+def test_missing_tie_break_prefers_lowest_missingness():
+    for seed in range(0, 10):
+        PED = lineage_ped([0.5, 0.2, 0.01, np.nan])
+        annotatedPED = select_unrelated(PED, seed = seed, tieBreak = "missing", missingnessColumn = "missingRate")[0]
+        assert selected(annotatedPED) == [3]
+
+def test_missing_tie_break_takes_empty_values_as_worst():
+    PED = lineage_ped([np.nan, np.nan, 0.9, np.nan])
+    assert selected(select_unrelated(PED, seed = 0, tieBreak = "missing", missingnessColumn = "missingRate")[0]) == [3]
+
+def test_missing_tie_break_requires_a_column():
+    with pytest.raises(ValueError):
+        select_unrelated(lineage_ped(0.1), tieBreak = "missing")
+    with pytest.raises(ValueError):
+        select_unrelated(lineage_ped(0.1), tieBreak = "missing", missingnessColumn = "callRate")
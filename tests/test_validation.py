@@ -0,0 +1,101 @@
+import random
+
+import numpy as np
+import pandas as pd
+
+from pedigreeGroupUnrelated import (build_pedigree_index, pedigree_cycles, repair_pedigree, run_pipeline,
+                                    select_unrelated, validate_pedigree)
+
+
+def ped(rows):
+    return(pd.DataFrame(rows, columns = ["famid", "id", "fid", "mid", "sex", "aff"]))
+
+def brute_force_cycles(pedigreeIndex):
+    size = len(pedigreeIndex["ids"])
+    offsets = pedigreeIndex["offsets"]
+    start = np.repeat(offsets[:-1], np.diff(offsets))
+    parents = [[start[i] + e for e in [pedigreeIndex["father"][i], pedigreeIndex["mother"][i]] if e != -1]
+               for i in range(0, size)]
+    cyclic = []
+    for i in range(0, size):
+        seen = set()
+        pending = list(parents[i])
+        while pending:
+            e = pending.pop()
+            if e not in seen:
+                seen.add(e)
+                pending.extend(parents[e])
+        if i in seen:
+            cyclic.append(i)
+    return(cyclic)
+
+def random_malformed_ped(size, seed):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(1, size + 1):
+        fid = rng.choice([0, 0, rng.randint(1, size + 2)])
+        mid = rng.choice([0, 0, rng.randint(1, size + 2)])
+        rows.append([rng.randint(1, 2), rng.randint(1, size) if rng.random() < 0.05 else i, fid, mid,
+                     rng.choice([1, 2, 2, 1, 0]), 1])
+    return(ped(rows))
+
+def test_pedigree_cycles_matches_brute_force():
+    for seed in range(0, 100):
+        pedigreeIndex = build_pedigree_index(random_malformed_ped(12, seed))
+        assert pedigree_cycles(pedigreeIndex).tolist() == brute_force_cycles(pedigreeIndex)
+
+def test_repair_removes_one_link_of_a_simple_cycle():
+    PED = ped([[1, 1, 3, 0, 1, 1], [1, 2, 1, 0, 1, 1], [1, 3, 2, 0, 1, 1], [1, 4, 3, 0, 2, 1]])
+    report = validate_pedigree(PED)
+    assert sorted(report.loc[report["check"] == "cycle", "id"].tolist()) == [1, 2, 3]
+    repaired, report = repair_pedigree(PED)
+    assert (repaired["fid"] == 0).sum() == 1
+    assert (report["action"] != "").sum() == 1
+    assert len(validate_pedigree(repaired)) == 0
+
+def test_repair_breaks_every_cycle():
+    for seed in range(0, 100):
+        PED = random_malformed_ped(12, seed)
+        repaired, report = repair_pedigree(PED)
+        assert report["action"].ne("").any() or len(report) == 0
+        remaining = validate_pedigree(repaired)
+        assert set(remaining["check"]) <= {"unknown_sex", "father_sex", "mother_sex"}
+
+def test_repair_of_malformed_rows():
+    PED = ped([[1, 1, 0, 0, 1, 1], [1, 1, 0, 0, 2, 1], [1, 2, 2, 0, 2, 1], [1, 3, 9, 8, 1, 1], [1, 4, 1, 1, 2, 1],
+               [1, 5, 6, 7, 1, 1], [1, 6, 0, 0, 2, 1], [1, 7, 0, 0, 1, 1]])
+    repaired, report = repair_pedigree(PED)
+    assert dict(zip(report["check"], report["action"])) == {"duplicate_id": "row dropped", "self_father": "fid set to 0",
+                                                           "missing_father": "founder added",
+                                                           "missing_mother": "founder added",
+                                                           "same_parents": "mid set to 0",
+                                                           "father_sex": "fid and mid swapped",
+                                                           "mother_sex": "fid and mid swapped"}
+    assert len(validate_pedigree(repaired)) == 0
+    assert sorted(repaired["id"].tolist()) == [1, 2, 3, 4, 5, 6, 7, 8, 9]
+    founders = repaired.set_index("id").loc[[9, 8], "sex"].tolist()
+    assert founders == [1, 2]
+
+def test_select_unrelated_validates_and_repairs():
+    PED = ped([[1, 1, 0, 0, 1, 1], [1, 2, 1, 9, 2, 1]])
+    annotatedPED, selectionReport, validationReport = select_unrelated(PED)
+    assert validationReport["check"].tolist() == ["missing_mother"]
+    annotatedPED, selectionReport, validationReport = select_unrelated(PED, repair = True)
+    assert validationReport["action"].tolist() == ["founder added"]
+    assert sorted(annotatedPED["id"].tolist()) == [1, 2, 9]
+
+def test_streamed_report_gives_rows_of_the_ped_file(tmp_path):
+    rows = []
+    for family in range(0, 30):
+        rows.extend([[family, 1, 0, 0, 1, 1], [family, 2, 0, 0, 2, 1], [family, 3, 1, 2, 1, 1]])
+    PED = ped(rows).sample(frac = 1, random_state = 0).reset_index(drop = True)
+    PED.loc[PED["id"] == 3, "mid"] = np.where(PED.loc[PED["id"] == 3, "famid"] % 7 == 0, 8, 2)
+    pedigreeFile = str(tmp_path / "shuffled.ped")
+    PED.to_csv(pedigreeFile, sep = '\t', index = False)
+    expected = np.flatnonzero((PED["mid"] == 8).to_numpy()).tolist()
+    for chunksize in [0, 10]:
+        resultsDirectory = str(tmp_path / ("results" + str(chunksize))) + "/"
+        run_pipeline(pedigreeFile, resultsDirectory, chunksize = chunksize, noGraphs = True)
+        report = pd.read_csv(resultsDirectory + "validation_report.tsv", sep = '\t')
+        assert sorted(report["row"].tolist()) == expected
+        assert (PED.loc[report["row"], "famid"].to_numpy() == report["famid"].to_numpy()).all()